@@ -1,118 +1,389 @@
-from http.server import BaseHTTPRequestHandler
-import json
+"""OpenAI 텍스트 교정/요약 API (api/index.py에서 router로 등록)"""
+
+import asyncio
+import hashlib
 import os
+import re
+from collections import OrderedDict
+from typing import List, Optional
 
-def call_openai(prompt, temperature=0, max_tokens=500):
-    """OpenAI API 호출"""
-    try:
-        import urllib.request
+import httpx
+import orjson
+from fastapi import APIRouter
+from pydantic import BaseModel, field_validator
+
+from api.responses import ORJSONResponse
+
+OPENAI_URL = 'https://api.openai.com/v1/chat/completions'
+OPENAI_MODEL = 'gpt-4o-mini'
+
+# temperature=0 응답 캐시 (동일 프롬프트 재호출 시 네트워크 생략)
+_CACHE_MAXSIZE = 2048
+_cache = OrderedDict()
 
+# 이벤트 루프마다 재사용되는 비동기 클라이언트 (배치 큐와 함께 _LoopState에 보관)
+_ASYNC_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=50)
+
+def _get_async_client():
+    """현재 이벤트 루프에 묶인 AsyncClient 반환"""
+    return _loop_state().client
+
+def _openai_payload(prompt, temperature, max_tokens, system=None):
+    messages = [{"role": "user", "content": prompt}]
+    if system:
+        # 고정된 system 프리픽스는 OpenAI 프롬프트 캐시 대상이 된다
+        messages.insert(0, {"role": "system", "content": system})
+    return {
+        "model": OPENAI_MODEL,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+
+def _cache_key(prompt, temperature, max_tokens, system=None):
+    digest = hashlib.sha1(f"{system or ''}\0{prompt}".encode('utf-8')).hexdigest()
+    return (OPENAI_MODEL, temperature, max_tokens, digest)
+
+def _cache_get(key):
+    if key not in _cache:
+        return None
+    _cache.move_to_end(key)
+    return _cache[key]
+
+def _cache_put(key, content):
+    _cache[key] = content
+    if len(_cache) > _CACHE_MAXSIZE:
+        _cache.popitem(last=False)
+
+async def call_openai(prompt, temperature=0, max_tokens=500, system=None):
+    """OpenAI API 호출 (temperature=0이면 결과 캐시)"""
+    key = _cache_key(prompt, temperature, max_tokens, system) if temperature == 0 else None
+    if key is not None:
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+
+    content = await _request_openai(prompt, temperature, max_tokens, system)
+    if key is not None and content is not None:
+        _cache_put(key, content)
+    return content
+
+async def _request_openai(prompt, temperature, max_tokens, system):
+    try:
         api_key = os.environ.get('OPENAI_API_KEY')
         if not api_key:
             print("No OPENAI_API_KEY found")
             return None
 
-        data = json.dumps({
-            "model": "gpt-4o-mini",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }).encode('utf-8')
-
-        req = urllib.request.Request(
-            'https://api.openai.com/v1/chat/completions',
-            data=data,
+        response = await _get_async_client().post(
+            OPENAI_URL,
+            content=orjson.dumps(_openai_payload(prompt, temperature, max_tokens, system)),
             headers={
                 'Content-Type': 'application/json',
                 'Authorization': f'Bearer {api_key}'
             }
         )
+        if response.status_code >= 400:
+            print(f"OpenAI error: HTTP {response.status_code}")
+            return None
 
-        with urllib.request.urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result['choices'][0]['message']['content']
+        # bytes 본문을 디코딩 없이 바로 파싱
+        result = orjson.loads(response.content)
+        return result['choices'][0]['message']['content']
     except Exception as e:
         print(f"OpenAI error: {e}")
         return None
 
-def format_text(text):
+# 한글이 없는 입력은 띄어쓰기 교정/요약 대상이 아님
+_HANGUL_RE = re.compile(r'[\uac00-\ud7a3]')
+
+# 모드별 system 지시문 (user 메시지에는 원문만 보낸다)
+_SYSTEM_FORMAT = "다음 한국어 텍스트의 띄어쓰기만 교정하세요. 내용 변경 금지."
+_SYSTEM_SUMMARY = "다음 텍스트의 핵심만 2-3줄로 요약하세요. 각 줄 앞에 • 붙이세요."
+_SYSTEM_PACKED = "입력은 '[번호] 텍스트' 형식의 여러 항목입니다. 각 항목의 [번호]를 앞에 그대로 붙여 같은 순서로 답하세요."
+
+_MODES = {
+    'format': {
+        'system': _SYSTEM_FORMAT,
+        'temperature': 0,
+        'max_tokens': lambda text: len(text) + 200,
+    },
+    'summarize': {
+        'system': _SYSTEM_SUMMARY,
+        'temperature': 0.2,
+        'max_tokens': lambda text: 300,
+    },
+}
+
+# 동시에 들어온 항목을 모아 한 번의 OpenAI 호출로 처리
+MAX_BATCH_SIZE = 16
+BATCH_WAIT_TIMEOUT_S = 0.05
+# gpt-4o-mini 최대 출력 토큰 (묶음 호출은 이 한도 안에서 나눠 보낸다)
+MAX_OUTPUT_TOKENS = 16384
+_loop_states = {}
+_inflight = set()
+
+# 줄 머리의 [번호] 부터 다음 [번호] 줄(또는 끝) 직전까지를 한 항목으로 본다
+_BATCH_PAT = re.compile(r'^[ \t]*\[(\d+)\][ \t]*(.*?)(?=^[ \t]*\[\d+\]|\Z)', re.DOTALL | re.MULTILINE)
+# 본문 안에 줄 머리 [번호]가 있으면 항목 경계와 구분할 수 없으므로 묶지 않는다
+_MARKER_LINE_RE = re.compile(r'^[ \t]*\[\d+\]', re.MULTILINE)
+
+def _single_request(mode, text):
+    """단일 항목 요청 -> (prompt, temperature, max_tokens, system)"""
+    spec = _MODES[mode]
+    max_tokens = min(spec['max_tokens'](text), MAX_OUTPUT_TOKENS)
+    return text, spec['temperature'], max_tokens, spec['system']
+
+async def _call_single(mode, text):
+    result = await call_openai(*_single_request(mode, text))
+    return result if result else text
+
+def _parse_packed(result, count):
+    """[번호] 형식 응답 -> {번호: 내용}
+
+    번호가 중복되거나 범위를 벗어나면 경계를 믿을 수 없으므로 빈 dict를 반환한다
+    (모든 항목이 개별 호출로 넘어감).
+    """
+    parsed = {}
+    for m in _BATCH_PAT.finditer(result):
+        index = int(m.group(1))
+        if index >= count or index in parsed:
+            return {}
+        parsed[index] = m.group(2).strip()
+    return parsed
+
+def _split_by_budget(mode, texts):
+    """출력 토큰 합이 MAX_OUTPUT_TOKENS를 넘지 않도록 순서대로 나눈 묶음 목록"""
+    spec = _MODES[mode]
+    groups = []
+    current = []
+    budget = 0
+    for text in texts:
+        tokens = spec['max_tokens'](text)
+        if current and budget + tokens > MAX_OUTPUT_TOKENS:
+            groups.append(current)
+            current = []
+            budget = 0
+        current.append(text)
+        budget += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+async def _call_packed(mode, texts):
+    """여러 항목을 토큰 한도 안의 묶음으로 나눠 동시에 호출 ([번호] 줄이 있는 항목은 개별 호출)"""
+    packable = []
+    single = []
+    for i, text in enumerate(texts):
+        (single if _MARKER_LINE_RE.search(text) else packable).append(i)
+    groups = _split_by_budget(mode, [texts[i] for i in packable])
+    results = await asyncio.gather(
+        *[_call_packed_group(mode, group) for group in groups],
+        *[_call_single(mode, texts[i]) for i in single]
+    )
+
+    outputs = [None] * len(texts)
+    packed_outputs = [output for group_outputs in results[:len(groups)] for output in group_outputs]
+    for i, output in zip(packable, packed_outputs):
+        outputs[i] = output
+    for i, output in zip(single, results[len(groups):]):
+        outputs[i] = output
+    return outputs
+
+async def _call_packed_group(mode, texts):
+    """한 프롬프트로 묶어 호출 (누락된 항목은 개별 호출을 동시에 실행)"""
+    if len(texts) == 1:
+        return [await _call_single(mode, texts[0])]
+
+    spec = _MODES[mode]
+    prompt = '\n'.join(f"[{i}] {text}" for i, text in enumerate(texts))
+    max_tokens = sum(spec['max_tokens'](text) for text in texts)
+    system = f"{spec['system']} {_SYSTEM_PACKED}"
+    result = await call_openai(prompt, spec['temperature'], max_tokens, system)
+    parsed = _parse_packed(result, len(texts)) if result else {}
+
+    # 묶음 응답에서 잘라낸 내용은 단일 요청 캐시에 넣지 않는다 (지시문이 달라 결과가 다를 수 있음)
+    outputs = [parsed.get(i) for i in range(len(texts))]
+    missing = [i for i, content in enumerate(outputs) if not content]
+    fallback = await asyncio.gather(*[_call_single(mode, texts[i]) for i in missing])
+    for i, content in zip(missing, fallback):
+        outputs[i] = content
+    return outputs
+
+async def _run_batch(batch):
+    by_mode = {}
+    for mode, text, future in batch:
+        by_mode.setdefault(mode, []).append((text, future))
+
+    for mode, entries in by_mode.items():
+        texts = [text for text, _ in entries]
+        try:
+            if len(texts) == 1:
+                outputs = [await _call_single(mode, texts[0])]
+            else:
+                outputs = await _call_packed(mode, texts)
+            for (_, future), output in zip(entries, outputs):
+                if not future.done():
+                    future.set_result(output)
+        except Exception as e:
+            for _, future in entries:
+                if not future.done():
+                    future.set_exception(e)
+
+class _LoopState:
+    """이벤트 루프 하나에 묶인 배치 큐, AsyncClient, 배처 태스크"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.client = httpx.AsyncClient(http2=True, limits=_ASYNC_LIMITS, timeout=30)
+        self.task = loop.create_task(_batcher(self))
+
+
+def _loop_state():
+    """현재 루프의 상태 반환 (없으면 생성, 닫힌 루프의 상태는 정리)"""
+    loop = asyncio.get_running_loop()
+    state = _loop_states.get(loop)
+    if state is None:
+        for closed in [other for other in _loop_states if other.is_closed()]:
+            del _loop_states[closed]
+        state = _loop_states[loop] = _LoopState(loop)
+    return state
+
+async def _batcher(state):
+    """큐에서 최대 MAX_BATCH_SIZE개 / BATCH_WAIT_TIMEOUT_S 동안 모아 처리
+
+    대기 중인 항목이 하나뿐이면 기다리지 않고 바로 처리한다. 루프 종료로
+    태스크가 취소되면 클라이언트를 닫고 상태를 제거한다.
+    """
+    loop = state.loop
+    queue = state.queue
+    try:
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty() and len(batch) < MAX_BATCH_SIZE:
+                batch.append(queue.get_nowait())
+            if len(batch) > 1:
+                deadline = loop.time() + BATCH_WAIT_TIMEOUT_S
+                while len(batch) < MAX_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            task = loop.create_task(_run_batch(batch))
+            _inflight.add(task)
+            task.add_done_callback(_inflight.discard)
+    finally:
+        if _loop_states.get(loop) is state:
+            del _loop_states[loop]
+        await state.client.aclose()
+
+async def _submit(mode, text):
+    """항목을 배치 큐에 넣고 결과 대기"""
+    spec = _MODES[mode]
+    if spec['temperature'] == 0:
+        cached = _cache_get(_cache_key(*_single_request(mode, text)))
+        if cached is not None:
+            return cached
+
+    state = _loop_state()
+    future = state.loop.create_future()
+    await state.queue.put((mode, text, future))
+    return await future
+
+async def format_text(text):
     """띄어쓰기 교정"""
-    if not text or len(text.strip()) < 10:
+    if not text or len(text.strip()) < 10 or not _HANGUL_RE.search(text):
         return text
-    prompt = f"띄어쓰기만 교정하세요. 내용 변경 금지:\n{text}"
-    result = call_openai(prompt, temperature=0, max_tokens=len(text) + 200)
-    return result if result else text
+    return await _submit('format', text)
 
-def summarize_text(text):
+async def summarize_text(text):
     """텍스트 요약"""
-    if not text or len(text.strip()) < 20:
+    if not text or len(text.strip()) < 20 or not _HANGUL_RE.search(text):
         return text
-    prompt = f"핵심만 2-3줄로 요약하세요. 각 줄 앞에 • 붙이세요:\n{text}"
-    result = call_openai(prompt, temperature=0.2, max_tokens=300)
-    return result if result else text
+    return await _submit('summarize', text)
 
-class handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-
-            # 배치 모드
-            if 'items' in data:
-                items = data['items']
-                results = {}
-
-                for item in items:
-                    key = item.get('key', '')
-                    text = item.get('text', '')
-                    mode = item.get('mode', 'format')
-
-                    if mode == 'summarize':
-                        results[key] = summarize_text(text)
-                    else:
-                        results[key] = format_text(text)
-
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({
-                    'success': True,
-                    'results': results
-                }).encode('utf-8'))
-            else:
-                # 단일 처리
-                text = data.get('text', '')
-                mode = data.get('mode', 'format')
-
-                if mode == 'summarize':
-                    result = summarize_text(text)
-                else:
-                    result = format_text(text)
-
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({
-                    'success': True,
-                    'result': result
-                }).encode('utf-8'))
+async def process_item(item):
+    """배치 항목 하나 처리 -> (key, 결과)"""
+    key = item.get('key', '')
+    text = item.get('text', '')
+    mode = item.get('mode', 'format')
 
-        except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({
-                'success': False,
-                'error': str(e)
-            }).encode('utf-8'))
-
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+    if mode == 'summarize':
+        return key, await summarize_text(text)
+    return key, await format_text(text)
+
+async def process_batch(items):
+    """배치 항목 동시 처리"""
+    pairs = await asyncio.gather(*[process_item(item) for item in items])
+    return dict(pairs)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+def _none_to_empty(value):
+    """null은 빈 문자열로 (기존 핸들러의 data.get(..., '')와 같은 동작)"""
+    return "" if value is None else value
+
+
+def _none_to_format(value):
+    """null mode는 기본값(format)으로"""
+    return "format" if value is None else value
+
+
+class FormatItem(BaseModel):
+    key: str = ""
+    text: str = ""
+    mode: str = "format"
+
+    _text_none = field_validator("text", mode="before")(_none_to_empty)
+    _mode_none = field_validator("mode", mode="before")(_none_to_format)
+
+    @field_validator("key", mode="before")
+    @classmethod
+    def _key_to_str(cls, value):
+        """숫자 key도 그대로 받는다 (응답 JSON에서는 문자열 key)"""
+        return "" if value is None else str(value)
+
+
+class FormatRequest(BaseModel):
+    text: str = ""
+    mode: str = "format"
+    items: Optional[List[FormatItem]] = None
+
+    _text_none = field_validator("text", mode="before")(_none_to_empty)
+    _mode_none = field_validator("mode", mode="before")(_none_to_format)
+
+
+class FormatBatchRequest(BaseModel):
+    items: List[FormatItem]
+
+
+@router.post("/api/format")
+async def format_endpoint(req: FormatRequest):
+    """텍스트 교정/요약 API (items가 있으면 배치 처리)"""
+    try:
+        if req.items is not None:
+            results = await process_batch([item.model_dump() for item in req.items])
+            return ORJSONResponse({"success": True, "results": results})
+
+        if req.mode == "summarize":
+            result = await summarize_text(req.text)
+        else:
+            result = await format_text(req.text)
+        return ORJSONResponse({"success": True, "result": result})
+    except Exception as e:
+        return ORJSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+@router.post("/api/format/batch")
+async def format_batch_endpoint(req: FormatBatchRequest):
+    """텍스트 교정/요약 배치 API"""
+    try:
+        results = await process_batch([item.model_dump() for item in req.items])
+        return ORJSONResponse({"success": True, "results": results})
+    except Exception as e:
+        return ORJSONResponse({"success": False, "error": str(e)}, status_code=500)
@@ -8,14 +8,23 @@ from pathlib import Path
 root = Path(__file__).parent.parent
 sys.path.insert(0, str(root))
 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from mangum import Mangum
+import numpy as np
+from collections import defaultdict
+import functools
+import heapq
 import json
+import re
 
-app = FastAPI(title="생기부 로드맵 RAG API")
+from api.format import router as format_router
+from api.responses import ORJSONResponse
+
+app = FastAPI(title="생기부 로드맵 RAG API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,11 +34,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(format_router)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    """/api/format 계열은 기존 오류 형식({success: false, error}, 500) 유지"""
+    if request.url.path.startswith("/api/format"):
+        error = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+        return ORJSONResponse({"success": False, "error": error}, status_code=500)
+    return await request_validation_exception_handler(request, exc)
+
 # 데이터 로드
 DATA_DIR = root / "data" / "metadata"
 
 
+@functools.lru_cache(maxsize=8)
 def load_json(filename):
+    """메타데이터 JSON 로드 (읽기 전용이므로 프로세스당 한 번만 파싱)"""
     filepath = DATA_DIR / filename
     if filepath.exists():
         with open(filepath, "r", encoding="utf-8") as f:
@@ -37,6 +59,29 @@ def load_json(filename):
     return []
 
 
+_STUDENTS = load_json("students.json")
+_RESEARCH = load_json("research.json")
+_SAETEUK = load_json("saeteuk.json")
+
+
+def _index_by_student(rows):
+    """student_id -> 행 목록 (원본 순서 유지)"""
+    index = defaultdict(list)
+    for row in rows:
+        index[row.get("student_id")].append(row)
+    return dict(index)
+
+
+# 내신 평균 배열 (범위 필터를 벡터 연산으로 처리)
+_NESIN = np.array([s.get("nesin_average") or 0.0 for s in _STUDENTS], dtype=np.float64)
+# 계열 매칭용 소문자 문자열 (요청마다 .lower() 하지 않도록 미리 계산)
+_DEPT_LC = [(s.get("final_department") or "").lower() for s in _STUDENTS]
+_MAJOR_LC = [(s.get("major_field") or "").lower() for s in _STUDENTS]
+
+_RESEARCH_BY_SID = _index_by_student(_RESEARCH)
+_SAETEUK_BY_SID = _index_by_student(_SAETEUK)
+
+
 class SearchRequest(BaseModel):
     nesin_range: str
     school_type: str = "일반고"
@@ -53,65 +98,66 @@ async def health():
 @app.get("/api/stats")
 async def get_stats():
     try:
-        students = load_json("students.json")
-        research = load_json("research.json")
-        saeteuk = load_json("saeteuk.json")
-
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
-            "total_students": len(students),
-            "total_research": len(research),
-            "total_saeteuk": len(saeteuk),
+            "total_students": len(_STUDENTS),
+            "total_research": len(_RESEARCH),
+            "total_saeteuk": len(_SAETEUK),
         })
     except Exception as e:
-        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+        return ORJSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+# 내신 구간 (앞 항목 우선)
+_NESIN_RANGES = {
+    "1등급": (1.0, 1.99),
+    "2등급": (2.0, 2.99),
+    "3등급": (3.0, 3.99),
+    "4등급": (4.0, 4.99),
+}
+# "10등급"의 "0등급" 같은 부분 일치를 막기 위해 앞이 숫자가 아닌 경우만 매칭
+_NESIN_PATS = [(re.compile(rf"(?<!\d){label}"), bounds) for label, bounds in _NESIN_RANGES.items()]
+
+
+@functools.lru_cache(maxsize=128)
+def parse_nesin(nesin_range: str) -> tuple:
+    """내신 범위 문자열 -> (min, max)"""
+    for pattern, bounds in _NESIN_PATS:
+        if pattern.search(nesin_range):
+            return bounds
+    return (0, 10)
 
 
 def search_students(nesin_range: str, school_type: str, major_field: str, top_k: int):
     """학생 검색 로직"""
-    students = load_json("students.json")
-    research_list = load_json("research.json")
-    saeteuk_list = load_json("saeteuk.json")
-
     # 내신 범위 파싱
-    nesin_min, nesin_max = 0, 10
-    if "1등급" in nesin_range:
-        nesin_min, nesin_max = 1.0, 1.99
-    elif "2등급" in nesin_range:
-        nesin_min, nesin_max = 2.0, 2.99
-    elif "3등급" in nesin_range:
-        nesin_min, nesin_max = 3.0, 3.99
-    elif "4등급" in nesin_range:
-        nesin_min, nesin_max = 4.0, 4.99
+    nesin_min, nesin_max = parse_nesin(nesin_range)
 
     # 필터링
-    filtered = []
-    for s in students:
-        nesin = s.get("nesin_average") or 0
-        if nesin_min <= nesin <= nesin_max:
-            score = 50  # 기본 점수
+    field = major_field.lower()
+    tokens = field.split("/")
 
-            # 계열 매칭
-            dept = (s.get("final_department") or "").lower()
-            major = s.get("major_field") or ""
-            field = major_field.lower()
+    filtered = []
+    for i in np.flatnonzero((_NESIN >= nesin_min) & (_NESIN <= nesin_max)):
+        score = 50  # 기본 점수
 
-            if field in dept or field in major.lower():
-                score += 50
-            elif any(k in dept for k in field.split("/")):
-                score += 40
+        # 계열 매칭
+        dept = _DEPT_LC[i]
+        if field in dept or field in _MAJOR_LC[i]:
+            score += 50
+        elif any(k in dept for k in tokens):
+            score += 40
 
-            filtered.append({**s, "match_score": score})
+        filtered.append({**_STUDENTS[i], "match_score": score})
 
     # 정렬 및 상위 k개
-    filtered.sort(key=lambda x: x.get("match_score", 0), reverse=True)
-    results = filtered[:top_k]
+    results = heapq.nlargest(top_k, filtered, key=lambda x: x.get("match_score", 0))
 
     # 각 학생의 탐구활동과 세특 가져오기
     for student in results:
         sid = student.get("id")
-        student["research"] = [r for r in research_list if r.get("student_id") == sid][:5]
-        student["saeteuk"] = [s for s in saeteuk_list if s.get("student_id") == sid][:3]
+        student["research"] = _RESEARCH_BY_SID.get(sid, [])[:5]
+        student["saeteuk"] = _SAETEUK_BY_SID.get(sid, [])[:3]
 
     return results
 
@@ -127,7 +173,7 @@ async def search(req: SearchRequest):
             req.top_k
         )
 
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "query": {
                 "nesin_range": req.nesin_range,
@@ -138,7 +184,7 @@ async def search(req: SearchRequest):
             "total_found": len(results),
         })
     except Exception as e:
-        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+        return ORJSONResponse({"success": False, "error": str(e)}, status_code=500)
 
 
 @app.post("/api/report/html")
@@ -154,10 +200,10 @@ async def get_report_html(req: SearchRequest):
 
         # HTML 생성
         html = generate_report_html(req, results)
-        return JSONResponse({"success": True, "html": html})
+        return ORJSONResponse({"success": True, "html": html})
 
     except Exception as e:
-        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+        return ORJSONResponse({"success": False, "error": str(e)}, status_code=500)
 
 
 @app.post("/api/report/markdown")
@@ -173,77 +219,77 @@ async def get_report_markdown(req: SearchRequest):
 
         # 마크다운 생성
         md = generate_report_markdown(req, results)
-        return JSONResponse({"success": True, "markdown": md})
+        return ORJSONResponse({"success": True, "markdown": md})
 
     except Exception as e:
-        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+        return ORJSONResponse({"success": False, "error": str(e)}, status_code=500)
 
 
 def generate_report_html(req: SearchRequest, students: list) -> str:
     """HTML 레포트 생성"""
-    html = f"""
+    parts = [f"""
     <div class="report">
         <h1>📚 맞춤 생기부 로드맵</h1>
         <p class="generated-at">검색 조건: {req.nesin_range} | {req.school_type} | {req.major_field}</p>
 
         <h2>🎯 유사 합격 사례 ({len(students)}명)</h2>
         <div class="student-cards">
-    """
+    """]
 
     for s in students:
-        html += f"""
+        parts.append(f"""
         <div class="student-card">
             <h3>{s.get('final_university', '미상')} {s.get('final_department', '')}</h3>
             <p>내신 {s.get('nesin_average', '?')}등급 | {s.get('school_type', '일반고')}</p>
         </div>
-        """
+        """)
 
-    html += "</div>"
+    parts.append("</div>")
 
     # 탐구활동 섹션
-    html += "<h2>📝 추천 탐구 주제</h2>"
+    parts.append("<h2>📝 추천 탐구 주제</h2>")
 
     for s in students:
         research_list = s.get("research", [])
         if research_list:
-            html += f"<h3>{s.get('final_university', '')} 합격생의 탐구활동</h3>"
-            html += "<div class='topics'><ul>"
+            parts.append(f"<h3>{s.get('final_university', '')} 합격생의 탐구활동</h3>")
+            parts.append("<div class='topics'><ul>")
             for r in research_list[:5]:
-                html += f"""
+                parts.append(f"""
                 <li>
                     <strong>[{r.get('term', '')}] {r.get('subject', '')}</strong><br>
                     {r.get('title', '')}
                 </li>
-                """
-            html += "</ul></div>"
+                """)
+            parts.append("</ul></div>")
 
     # 세특 섹션
-    html += "<h2>✍️ 세특 예시</h2>"
+    parts.append("<h2>✍️ 세특 예시</h2>")
 
     for s in students:
         saeteuk_list = s.get("saeteuk", [])
         if saeteuk_list:
-            html += f"<h3>{s.get('final_university', '')} 합격생</h3>"
+            parts.append(f"<h3>{s.get('final_university', '')} 합격생</h3>")
             for st in saeteuk_list[:2]:
                 content = st.get('content', '')[:500]
                 if len(st.get('content', '')) > 500:
                     content += "..."
-                html += f"""
+                parts.append(f"""
                 <div class="saeteuk-card">
                     <div class="saeteuk-header">
                         <strong>{st.get('subject', '')}</strong>
                     </div>
                     <div class="saeteuk-content">{content}</div>
                 </div>
-                """
+                """)
 
-    html += "</div>"
-    return html
+    parts.append("</div>")
+    return "".join(parts)
 
 
 def generate_report_markdown(req: SearchRequest, students: list) -> str:
     """마크다운 레포트 생성"""
-    md = f"""# 📚 맞춤 생기부 로드맵
+    parts = [f"""# 📚 맞춤 생기부 로드맵
 
 **검색 조건**: {req.nesin_range} | {req.school_type} | {req.major_field}
 
@@ -251,32 +297,32 @@ def generate_report_markdown(req: SearchRequest, students: list) -> str:
 
 ## 🎯 유사 합격 사례 ({len(students)}명)
 
-"""
+"""]
 
     for s in students:
-        md += f"- **{s.get('final_university', '미상')} {s.get('final_department', '')}** (내신 {s.get('nesin_average', '?')}등급)\n"
+        parts.append(f"- **{s.get('final_university', '미상')} {s.get('final_department', '')}** (내신 {s.get('nesin_average', '?')}등급)\n")
 
-    md += "\n---\n\n## 📝 추천 탐구 주제\n\n"
+    parts.append("\n---\n\n## 📝 추천 탐구 주제\n\n")
 
     for s in students:
         research_list = s.get("research", [])
         if research_list:
-            md += f"### {s.get('final_university', '')} 합격생\n\n"
+            parts.append(f"### {s.get('final_university', '')} 합격생\n\n")
             for r in research_list[:5]:
-                md += f"- **[{r.get('term', '')}] {r.get('subject', '')}**: {r.get('title', '')}\n"
-            md += "\n"
+                parts.append(f"- **[{r.get('term', '')}] {r.get('subject', '')}**: {r.get('title', '')}\n")
+            parts.append("\n")
 
-    md += "---\n\n## ✍️ 세특 예시\n\n"
+    parts.append("---\n\n## ✍️ 세특 예시\n\n")
 
     for s in students:
         saeteuk_list = s.get("saeteuk", [])
         if saeteuk_list:
-            md += f"### {s.get('final_university', '')} 합격생\n\n"
+            parts.append(f"### {s.get('final_university', '')} 합격생\n\n")
             for st in saeteuk_list[:2]:
-                md += f"**{st.get('subject', '')}**\n\n"
-                md += f"> {st.get('content', '')[:500]}...\n\n"
+                parts.append(f"**{st.get('subject', '')}**\n\n")
+                parts.append(f"> {st.get('content', '')[:500]}...\n\n")
 
-    return md
+    return "".join(parts)
 
 
 # Vercel serverless handler
@@ -0,0 +1,11 @@
+"""공용 응답 클래스"""
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """orjson으로 직렬화하는 JSON 응답 (bytes를 바로 반환)"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
@@ -1,35 +1,64 @@
 """전체 학생 페이지 범위 찾기"""
 from src.extractor.pdf_reader import PDFReader
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import re
 
+# 학생 헤더: "1.23등급 ... OO대학교 OO학과" (DOTALL 없음 - 같은 줄 안에서만 매칭)
+_PAT = re.compile(r'(\d+\.\d+)등급.*?([가-힣]+대학교?)\s*([가-힣]+학과|[가-힣]+학부)')
+_search = _PAT.search
+
 pdf_path = Path(r'C:\Users\iamhj\Downloads\유니브클래스_2025_인문사회상경_생기부대백과 (1).pdf')
 
-with PDFReader(pdf_path) as reader:
+LAST_PAGE = 284
+CHUNK_SIZE = 32
+
+
+def scan_chunk(page_range):
+    """페이지 구간을 스캔해 헤더가 있는 페이지의 (page, grade, univ, dept) 반환"""
+    start, end = page_range
+    found = []
+    # fitz 문서는 프로세스 간 공유가 안 되므로 워커마다 따로 연다
+    with PDFReader(pdf_path) as reader:
+        for page, text in reader.iter_pages(start, end):
+            # '등급'이 없는 페이지는 정규식 탐색 생략
+            match = _search(text) if '등급' in text else None
+            if match:
+                found.append((page, match.group(1), match.group(2), match.group(3)))
+    return found
+
+
+def main():
+    ranges = [(i, min(i + CHUNK_SIZE - 1, LAST_PAGE)) for i in range(1, LAST_PAGE + 1, CHUNK_SIZE)]
+
     students = []
     current = None
 
-    for page in range(1, 285):
-        text = reader.extract_page_range(page, page)
-        match = re.search(r'(\d+\.\d+)등급.*?([가-힣]+대학교?)\s*([가-힣]+학과|[가-힣]+학부)', text)
-        if match:
-            key = f'{match.group(1)}_{match.group(2)}_{match.group(3)}'
-            if current != key:
-                if current and students:
-                    students[-1]['end'] = page - 1
-                students.append({
-                    'start': page,
-                    'grade': match.group(1),
-                    'univ': match.group(2),
-                    'dept': match.group(3),
-                    'key': key
-                })
-                current = key
+    with ProcessPoolExecutor() as ex:
+        # map은 입력 순서대로 결과를 돌려주므로 페이지 순서가 유지된다
+        for batch in ex.map(scan_chunk, ranges):
+            for page, grade, univ, dept in batch:
+                key = f'{grade}_{univ}_{dept}'
+                if current != key:
+                    if current and students:
+                        students[-1]['end'] = page - 1
+                    students.append({
+                        'start': page,
+                        'grade': grade,
+                        'univ': univ,
+                        'dept': dept,
+                        'key': key
+                    })
+                    current = key
 
     if students:
-        students[-1]['end'] = 284
+        students[-1]['end'] = LAST_PAGE
 
     print(f'Found {len(students)} students total:\n')
     for i, s in enumerate(students, 1):
         pages = s['end'] - s['start'] + 1
         print(f"{i}. [{s['start']}-{s['end']}] ({pages}p) {s['grade']} {s['univ']} {s['dept']}")
+
+
+if __name__ == '__main__':
+    main()
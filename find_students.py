@@ -3,6 +3,10 @@ from src.extractor.pdf_reader import PDFReader
 from pathlib import Path
 import re
 
+# 학생 헤더: "1.23등급 ... OO대학교 OO학과" (DOTALL 없음 - 같은 줄 안에서만 매칭)
+_PAT = re.compile(r'(\d+\.\d+)등급.*?([가-힣]+대학교?)\s*([가-힣]+학과|[가-힣]+학부)')
+_search = _PAT.search
+
 pdf_path = Path(r'C:\Users\iamhj\Downloads\유니브클래스_2025_인문사회상경_생기부대백과 (1).pdf')
 
 with PDFReader(pdf_path) as reader:
@@ -12,9 +16,9 @@ with PDFReader(pdf_path) as reader:
     students = []
     current_student = None
 
-    for page in range(72, min(total_pages, 300)):
-        text = reader.extract_page_range(page, page)
-        match = re.search(r'(\d+\.\d+)등급.*?([가-힣]+대학교?)\s*([가-힣]+학과|[가-힣]+학부)', text)
+    for page, text in reader.iter_pages(72, min(total_pages, 300) - 1):
+        # '등급'이 없는 페이지는 정규식 탐색 생략
+        match = _search(text) if '등급' in text else None
         if match:
             grade = match.group(1)
             univ = match.group(2)
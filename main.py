@@ -1,29 +1,42 @@
 """대입 합격자 사례 PDF 파서 - CLI 진입점"""
 
+from __future__ import annotations
+
+import functools
+import hashlib
 import json
 import os
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import typer
 
 from config import OUTPUT_DIR
-from src.extractor.pdf_reader import PDFReader
-from src.extractor.table_parser import TableParser
-from src.parser.section_detector import SectionDetector, SectionType
-from src.parser.grades_parser import GradesParser
-from src.parser.susi_parser import SusiParser
-from src.parser.school_parser import SchoolParser
-from src.parser.roadmap_parser import RoadmapParser
-from src.parser.saenggibu_parser import SaenggibuParser
-from src.linker.research_saeteuk_linker import ResearchSaeteukLinker
-from src.reporter.markdown_generator import MarkdownGenerator
-from src.models.schema import StudentData
+
+# 파서/PDF 모듈은 무거우므로 실제로 쓰는 함수 안에서 불러온다 (--help 등 시작 속도)
+if TYPE_CHECKING:
+    from src.models.schema import StudentData
 
 app = typer.Typer(help="대입 합격자 사례 PDF 파서")
 
+# 파싱 결과 캐시 형식 버전 (StudentData 구조나 파싱 규칙이 바뀌면 올린다)
+PARSE_CACHE_VERSION = 1
+
+# 캐시 키에 소스 해시를 넣을 파싱 관련 코드 (수정하면 기존 캐시는 자동으로 무효)
+PARSE_SOURCE_PATHS = ("main.py", "src/extractor", "src/linker", "src/models", "src/parser")
+
 
 def parse_pdf_regex(full_text: str, pdf_path: Path) -> StudentData:
     """정규식 기반 파싱"""
+    from src.extractor.table_parser import TableParser
+    from src.parser.grades_parser import GradesParser
+    from src.parser.susi_parser import SusiParser
+    from src.parser.school_parser import SchoolParser
+    from src.parser.roadmap_parser import RoadmapParser
+    from src.parser.saenggibu_parser import SaenggibuParser
+    from src.linker.research_saeteuk_linker import ResearchSaeteukLinker
+    from src.models.schema import StudentData
+
     table_parser = TableParser(pdf_path)
 
     grades = GradesParser(table_parser).parse(full_text)
@@ -54,11 +67,14 @@ def parse_pdf_regex(full_text: str, pdf_path: Path) -> StudentData:
     )
 
 
-def parse_pdf_llm(full_text: str, pdf_path: Path, api_key: str) -> StudentData:
+def parse_pdf_llm(
+    full_text: str, pdf_path: Path, api_key: str, cache_dir: Path | None = None
+) -> StudentData:
     """LLM 기반 파싱"""
     from src.parser.llm_parser import LLMParser
+    from src.linker.research_saeteuk_linker import ResearchSaeteukLinker
 
-    parser = LLMParser(api_key=api_key)
+    parser = LLMParser(api_key=api_key, cache_dir=cache_dir)
     data = parser.parse_all(
         text=full_text,
         alias=pdf_path.stem,
@@ -78,8 +94,55 @@ def parse_pdf_llm(full_text: str, pdf_path: Path, api_key: str) -> StudentData:
     return data
 
 
+@functools.lru_cache(maxsize=1)
+def parser_source_digest() -> str:
+    """파싱 관련 소스 파일 전체의 해시"""
+    root = Path(__file__).resolve().parent
+    digest = hashlib.sha256()
+    for name in PARSE_SOURCE_PATHS:
+        path = root / name
+        files = sorted(path.rglob("*.py")) if path.is_dir() else [path]
+        for file in files:
+            digest.update(file.relative_to(root).as_posix().encode("utf-8") + b"\0")
+            digest.update(hashlib.sha256(file.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def parse_cache_path(cache_dir: Path, mode: str, pdf_path: Path, full_text: str) -> Path:
+    """파싱 결과 캐시 경로 (캐시 버전 + 파서 소스 + 모드 + PDF 내용 + 추출 텍스트 해시)"""
+    digest = hashlib.sha256()
+    digest.update(f"{PARSE_CACHE_VERSION}\0{parser_source_digest()}\0".encode("utf-8"))
+    digest.update(f"{mode}\0{pdf_path.name}\0".encode("utf-8"))
+    # TableParser는 텍스트가 아닌 PDF를 직접 읽으므로 원본 바이트도 키에 포함
+    digest.update(hashlib.sha256(pdf_path.read_bytes()).digest())
+    digest.update(full_text.encode("utf-8"))
+    return cache_dir / f"{digest.hexdigest()}.json"
+
+
+def load_cached(cache_path: Path) -> StudentData | None:
+    """캐시된 파싱 결과 로드 (없거나 깨졌으면 None)"""
+    if not cache_path.exists():
+        return None
+    from src.models.schema import StudentData
+
+    try:
+        return StudentData.model_validate_json(cache_path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+
+
+def save_cache(data: StudentData, cache_path: Path) -> None:
+    """파싱 결과 캐시 저장 (임시 파일 작성 후 교체)"""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    tmp_path.write_text(data.model_dump_json(), encoding="utf-8")
+    os.replace(tmp_path, cache_path)
+
+
 def save_outputs(data: StudentData, output_dir: Path) -> tuple[Path, Path]:
     """JSON과 마크다운 파일 저장"""
+    from src.reporter.markdown_generator import MarkdownGenerator
+
     output_dir.mkdir(parents=True, exist_ok=True)
 
     json_path = output_dir / f"{data.alias}_data.json"
@@ -131,6 +194,11 @@ def main(
         envvar="OPENAI_API_KEY",
         help="OpenAI API 키",
     ),
+    use_cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="파싱 결과 캐시 사용 (출력 디렉토리의 .cache)",
+    ),
     verbose: bool = typer.Option(
         False,
         "--verbose", "-v",
@@ -153,22 +221,37 @@ def main(
     try:
         # PDF 텍스트 추출
         print("  텍스트 추출 중...")
+        from src.extractor.pdf_reader import PDFReader
+
         with PDFReader(pdf_path) as reader:
             if start_page and end_page:
                 full_text = reader.extract_page_range(start_page, end_page)
             else:
                 full_text = reader.extract_with_markers()
 
-        # 파싱
-        print("  파싱 중...")
-        if use_llm:
-            if not api_key:
-                print("\n[오류] --llm 옵션 사용시 OPENAI_API_KEY가 필요합니다")
-                print("  환경변수로 설정하거나 --api-key 옵션을 사용하세요")
-                raise typer.Exit(1)
-            data = parse_pdf_llm(full_text, pdf_path, api_key)
+        # 파싱 (같은 PDF/텍스트면 캐시 사용)
+        cache_dir = output_dir / ".cache" if use_cache else None
+        cache_path = None
+        data = None
+        if cache_dir:
+            mode = "llm" if use_llm else "regex"
+            cache_path = parse_cache_path(cache_dir, mode, pdf_path, full_text)
+            data = load_cached(cache_path)
+
+        if data is not None:
+            print("  캐시된 파싱 결과 사용")
         else:
-            data = parse_pdf_regex(full_text, pdf_path)
+            print("  파싱 중...")
+            if use_llm:
+                if not api_key:
+                    print("\n[오류] --llm 옵션 사용시 OPENAI_API_KEY가 필요합니다")
+                    print("  환경변수로 설정하거나 --api-key 옵션을 사용하세요")
+                    raise typer.Exit(1)
+                data = parse_pdf_llm(full_text, pdf_path, api_key, cache_dir)
+            else:
+                data = parse_pdf_regex(full_text, pdf_path)
+            if cache_path:
+                save_cache(data, cache_path)
 
         # 저장
         print("  파일 저장 중...")
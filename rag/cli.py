@@ -1,5 +1,8 @@
 """RAG 시스템 CLI"""
 
+import logging
+import os
+
 import typer
 from pathlib import Path
 
@@ -8,6 +11,15 @@ from .converter import DataConverter
 app = typer.Typer(help="RAG 기반 생기부 로드맵 시스템")
 
 
+def setup_logging():
+    """진행 로그 설정 (RAG_VERBOSE=1이면 배치 단위 진행 상황까지 출력)"""
+    verbose = os.getenv("RAG_VERBOSE") == "1"
+    logging.basicConfig(
+        level=logging.INFO if verbose else logging.WARNING,
+        format="    %(message)s",
+    )
+
+
 @app.command()
 def convert(
     input_dir: Path = typer.Option(
@@ -80,16 +92,23 @@ def index(
         envvar="OPENAI_API_KEY",
         help="OpenAI API 키",
     ),
+    rebuild: bool = typer.Option(
+        False,
+        "--rebuild",
+        help="기존 컬렉션을 지우고 새로 생성",
+    ),
 ):
     """벡터 임베딩 생성 및 인덱싱"""
     from .indexer import RAGIndexer
 
+    setup_logging()
+
     print(f"\n[벡터 인덱싱]")
     print(f"  데이터: {data_dir}")
     print(f"  벡터DB: {db_dir}")
 
     indexer = RAGIndexer(api_key=api_key, db_path=str(db_dir))
-    indexer.index_from_metadata(data_dir)
+    indexer.index_from_metadata(data_dir, force_rebuild=rebuild)
 
 
 @app.command()
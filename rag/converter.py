@@ -1,12 +1,18 @@
 """기존 파싱 데이터를 RAG 스키마로 변환"""
 
-import json
+import copy
 import hashlib
+import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
+from statistics import fmean
 from typing import Optional
 
+import orjson
+
 from .schema import (
     StudentProfile,
     ResearchActivity,
@@ -21,6 +27,68 @@ from .schema import (
 )
 
 
+# 학기 패턴 (예: '2-1')
+_TERM_RE = re.compile(r"(\d)-(\d)")
+
+
+def _build_keyword_matcher(groups: list[tuple[str, list[str]]]) -> tuple[re.Pattern, dict[str, int]]:
+    """(그룹, 키워드들) 목록 → 겹침 허용 정규식 + 키워드별 우선순위
+
+    대안을 우선순위 순으로 나열하므로 같은 위치에서 여러 키워드가 맞으면
+    가장 앞선 그룹의 키워드가 잡힌다. 키워드는 이미 정규화(소문자)된 상태여야 한다.
+    """
+    priority: dict[str, int] = {}
+    for i, (_, keywords) in enumerate(groups):
+        for kw in keywords:
+            priority.setdefault(kw, i)
+    alternation = "|".join(re.escape(kw) for kw in priority)
+    return re.compile(f"(?=({alternation}))"), priority
+
+
+def _build_ladder(rules: list[tuple[list[str], str]]) -> tuple[re.Pattern, tuple[str, ...]]:
+    """(키워드들, 값) if-elif 사다리 → 단일 정규식 + 그룹 번호별 값
+
+    각 규칙을 앵커된 lookahead로 감싸 텍스트 위치가 아닌 규칙 순서대로 시도한다.
+    `pattern.match(text).lastindex - 1`이 처음 맞은 규칙의 인덱스다.
+    """
+    alternation = "|".join(
+        "(?=.*?(" + "|".join(re.escape(kw) for kw in keywords) + "))" for keywords, _ in rules
+    )
+    return re.compile(alternation, re.DOTALL), tuple(value for _, value in rules)
+
+
+def _build_tier_index(tiers: dict[str, list[str]]) -> dict[str, str]:
+    """대학명 → 티어 역색인
+
+    부분 일치 스캔과 같은 결과가 되도록 각 이름을 스캔했을 때 처음 맞는 티어를 값으로 둔다.
+    """
+    index: dict[str, str] = {}
+    for name in (u for universities in tiers.values() for u in universities):
+        index[name] = next(
+            tier for tier, universities in tiers.items()
+            if any(u in name or name in u for u in universities)
+        )
+    return index
+
+
+_GRADE_TYPE_RE, _GRADE_TYPE_VALUES = _build_ladder([
+    (["내신"], GradeType.NESIN.value),
+    (["수능"], GradeType.SUNEUNG.value),
+    (["균형"], GradeType.BALANCED.value),
+])
+_SCHOOL_TYPE_RE, _SCHOOL_TYPE_VALUES = _build_ladder([
+    (["일반"], SchoolType.GENERAL.value),
+    (["자사", "자율"], SchoolType.AUTONOMOUS_PRIVATE.value),
+    (["특목", "외고", "과학"], SchoolType.SPECIALIZED.value),
+    (["영재"], SchoolType.GIFTED.value),
+])
+_COMPETITION_RE, _COMPETITION_VALUES = _build_ladder([
+    (["높", "치열", "상위", "경쟁"], CompetitionLevel.HIGH.value),
+    (["보통", "중"], CompetitionLevel.MEDIUM.value),
+    (["낮"], CompetitionLevel.LOW.value),
+])
+
+
 class DataConverter:
     """기존 JSON 데이터 → RAG 스키마 변환기"""
 
@@ -31,6 +99,8 @@ class DataConverter:
         "인서울": ["건국대학교", "동국대학교", "홍익대학교", "국민대학교", "숭실대학교", "세종대학교", "단국대학교", "광운대학교"],
         "지방거점": ["부산대학교", "경북대학교", "전남대학교", "전북대학교", "충남대학교", "충북대학교", "강원대학교", "제주대학교"],
     }
+    # 정확히 일치하는 대학명은 스캔 없이 바로 조회
+    _UNIV_TO_TIER = _build_tier_index(UNIVERSITY_TIERS)
 
     # 계열 키워드 매핑 (우선순위 순서: 구체적인 것 먼저)
     MAJOR_FIELD_KEYWORDS = [
@@ -43,12 +113,31 @@ class DataConverter:
         ("경영/경제", ["경영", "경제", "금융", "회계", "무역", "국제통상", "세무", "재무", "상경"]),
         ("예체능", ["미술", "음악", "체육", "디자인", "연극", "영화"]),
     ]
+    # 소문자 검색 텍스트와 비교할 스캔 테이블 (클래스 정의 시 한 번만 소문자화)
+    MAJOR_FIELD_KEYWORDS_LOWER = [(field, [kw.lower() for kw in kws]) for field, kws in MAJOR_FIELD_KEYWORDS]
+    _FIELD_RE, _FIELD_PRIORITY = _build_keyword_matcher(MAJOR_FIELD_KEYWORDS_LOWER)
+
+    # 탐구/세특 주요 키워드 사전 (앞에 있을수록 우선)
+    KEYWORD_DICT = [
+        "경영", "경제", "금융", "투자", "기업", "마케팅", "ESG", "탄소",
+        "환경", "기후", "에너지", "반도체", "AI", "인공지능", "데이터",
+        "정치", "외교", "사회", "복지", "법", "정책", "무역", "글로벌",
+        "수학", "통계", "과학", "기술", "의료", "건강", "심리", "교육",
+    ]
+    # 겹쳐 등장하는 키워드(예: "환경제" 속 환경/경제)도 모두 잡도록 lookahead 사용
+    _KEYWORD_RE = re.compile("(?=(" + "|".join(re.escape(kw) for kw in KEYWORD_DICT) + "))")
 
     def __init__(self):
         self.converted_documents: list[RAGDocument] = []
 
     def convert_file(self, json_path: Path) -> RAGDocument:
         """단일 JSON 파일 변환"""
+        doc = self.build_document(json_path)
+        self.converted_documents.append(doc)
+        return doc
+
+    def build_document(self, json_path: Path) -> RAGDocument:
+        """단일 JSON 파일 → RAGDocument (상태 변경 없음)"""
         with open(json_path, "r", encoding="utf-8") as f:
             data = json.load(f)
 
@@ -73,14 +162,11 @@ class DataConverter:
             saeteuk_examples=saeteuk_examples,
             created_at=datetime.now().isoformat(),
         )
-
-        self.converted_documents.append(doc)
         return doc
 
     def _generate_id(self, base: str) -> str:
-        """고유 ID 생성"""
-        hash_input = f"{base}_{datetime.now().isoformat()}"
-        return hashlib.md5(hash_input.encode()).hexdigest()[:12]
+        """base(학생 별칭)에서 안정적인 ID 생성 (재변환해도 같은 ID → 재색인 시 upsert로 갱신)"""
+        return hashlib.blake2b(base.encode("utf-8"), digest_size=6).hexdigest()
 
     def _convert_profile(self, data: dict, student_id: str) -> StudentProfile:
         """학생 프로필 변환"""
@@ -131,11 +217,11 @@ class DataConverter:
         if not rows:
             return None
 
-        grades = [r.get("grade") for r in rows if r.get("grade")]
+        grades = [g for r in rows if (g := r.get("grade"))]
         if not grades:
             return None
 
-        return round(sum(grades) / len(grades), 2)
+        return round(fmean(grades), 2)
 
     def _get_grade_range(self, avg: Optional[float]) -> Optional[str]:
         """등급대 계산"""
@@ -156,13 +242,8 @@ class DataConverter:
         """성적 유형 파싱"""
         if not grade_type:
             return None
-        if "내신" in grade_type:
-            return GradeType.NESIN.value
-        elif "수능" in grade_type:
-            return GradeType.SUNEUNG.value
-        elif "균형" in grade_type:
-            return GradeType.BALANCED.value
-        return grade_type
+        m = _GRADE_TYPE_RE.match(grade_type)
+        return _GRADE_TYPE_VALUES[m.lastindex - 1] if m else grade_type
 
     def _get_final_department(self, susi_card: dict) -> Optional[str]:
         """최종 진학 학과 추출"""
@@ -182,6 +263,10 @@ class DataConverter:
         if not univ:
             return None
 
+        tier = self._UNIV_TO_TIER.get(univ.strip())
+        if tier:
+            return tier
+
         for tier, universities in self.UNIVERSITY_TIERS.items():
             for u in universities:
                 if u in univ or univ in u:
@@ -192,38 +277,33 @@ class DataConverter:
         """계열 추론 (우선순위 기반)"""
         search_text = f"{dept or ''} {theme or ''}".lower()
 
-        for field, keywords in self.MAJOR_FIELD_KEYWORDS:
-            for keyword in keywords:
-                if keyword.lower() in search_text:
-                    return field
+        # 텍스트를 한 번만 훑으며 가장 우선순위가 높은 계열을 고른다
+        best = None
+        for m in self._FIELD_RE.finditer(search_text):
+            rank = self._FIELD_PRIORITY[m.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    break
 
-        return MajorField.OTHER.value
+        if best is None:
+            return MajorField.OTHER.value
+        return self.MAJOR_FIELD_KEYWORDS_LOWER[best][0]
 
     def _parse_school_type(self, school_type: Optional[str]) -> Optional[str]:
         """학교 유형 파싱"""
         if not school_type:
             return None
-        if "일반" in school_type:
-            return SchoolType.GENERAL.value
-        elif "자사" in school_type or "자율" in school_type:
-            return SchoolType.AUTONOMOUS_PRIVATE.value
-        elif "특목" in school_type or "외고" in school_type or "과학" in school_type:
-            return SchoolType.SPECIALIZED.value
-        elif "영재" in school_type:
-            return SchoolType.GIFTED.value
-        return school_type
+        m = _SCHOOL_TYPE_RE.match(school_type)
+        return _SCHOOL_TYPE_VALUES[m.lastindex - 1] if m else school_type
 
     def _parse_competition_level(self, level: Optional[str]) -> Optional[str]:
         """경쟁 수준 파싱"""
         if not level:
             return None
-        level_lower = level.lower()
-        if "높" in level or "치열" in level or "상위" in level or "경쟁" in level:
-            return CompetitionLevel.HIGH.value
-        elif "보통" in level or "중" in level:
-            return CompetitionLevel.MEDIUM.value
-        elif "낮" in level:
-            return CompetitionLevel.LOW.value
+        m = _COMPETITION_RE.match(level)
+        if m:
+            return _COMPETITION_VALUES[m.lastindex - 1]
         # 기본값: 높음으로 처리 (대부분의 합격 사례가 경쟁이 있는 학교)
         return CompetitionLevel.HIGH.value
 
@@ -264,7 +344,7 @@ class DataConverter:
         """학기 문자열 파싱 (예: '2-1' -> (2, 1))"""
         if not term:
             return 0, 0
-        match = re.match(r"(\d)-(\d)", str(term))
+        match = _TERM_RE.match(term)
         if match:
             return int(match.group(1)), int(match.group(2))
         return 0, 0
@@ -284,18 +364,9 @@ class DataConverter:
 
     def _extract_keywords(self, text: str) -> list[str]:
         """텍스트에서 키워드 추출 (간단한 규칙 기반)"""
-        # 주요 키워드 사전
-        keyword_dict = [
-            "경영", "경제", "금융", "투자", "기업", "마케팅", "ESG", "탄소",
-            "환경", "기후", "에너지", "반도체", "AI", "인공지능", "데이터",
-            "정치", "외교", "사회", "복지", "법", "정책", "무역", "글로벌",
-            "수학", "통계", "과학", "기술", "의료", "건강", "심리", "교육",
-        ]
-
-        found = []
-        for kw in keyword_dict:
-            if kw in text:
-                found.append(kw)
+        # 텍스트에 등장한 키워드를 한 번에 수집한 뒤 사전 순서대로 정렬
+        present = set(self._KEYWORD_RE.findall(text))
+        found = [kw for kw in self.KEYWORD_DICT if kw in present]
         return found[:5]  # 최대 5개
 
     def _convert_saeteuk_examples(self, data: dict, student_id: str) -> list[SaeteukExample]:
@@ -347,71 +418,130 @@ class DataConverter:
         # ID 매핑 생성
         research_map = {r.id: r for r in research_activities}
         saeteuk_map = {s.id: s for s in saeteuk_examples}
+        research_len = self._uniform_id_length(research_map)
+        saeteuk_len = self._uniform_id_length(saeteuk_map)
 
         for link in linked:
             research_id = link.get("research_id", "")
             saeteuk_id = link.get("saeteuk_id", "")
 
             # 부분 매칭 (ID가 축약된 경우)
-            for rid, research in research_map.items():
-                if research_id in rid or rid in research_id:
-                    for sid, saeteuk in saeteuk_map.items():
-                        if saeteuk_id in sid or sid in saeteuk_id:
-                            research.linked_saeteuk_id = sid
-                            if rid not in saeteuk.linked_research_ids:
-                                saeteuk.linked_research_ids.append(rid)
+            sids = self._match_ids(saeteuk_id, saeteuk_map, saeteuk_len)
+            for rid in self._match_ids(research_id, research_map, research_len):
+                research = research_map[rid]
+                for sid in sids:
+                    saeteuk = saeteuk_map[sid]
+                    research.linked_saeteuk_id = sid
+                    if rid not in saeteuk.linked_research_ids:
+                        saeteuk.linked_research_ids.append(rid)
+
+    @staticmethod
+    def _uniform_id_length(id_map: dict) -> Optional[int]:
+        """모든 ID 길이가 같으면 그 길이, 아니면 None"""
+        lengths = {len(i) for i in id_map}
+        return lengths.pop() if len(lengths) == 1 else None
+
+    @staticmethod
+    def _match_ids(link_id: str, id_map: dict, id_len: Optional[int]) -> list[str]:
+        """link_id와 부분 문자열 관계인 ID 목록 (id_map 순서)"""
+        # 길이가 같은 문자열끼리는 포함 관계 = 동일이므로 해시 조회로 충분
+        if id_len is not None and len(link_id) == id_len:
+            return [link_id] if link_id in id_map else []
+        return [i for i in id_map if link_id in i or i in link_id]
 
     def convert_directory(self, input_dir: Path, output_dir: Path) -> list[RAGDocument]:
         """디렉토리 내 모든 JSON 파일 변환"""
         json_files = list(input_dir.glob("*_data.json"))
         print(f"[변환] {len(json_files)}개 파일 발견")
 
-        documents = []
-        for json_path in json_files:
-            try:
+        results = {}
+        if len(json_files) > 1:
+            # 파일별 변환은 서로 독립적이므로 프로세스 풀로 나눠 처리
+            # (워커에는 이 인스턴스의 설정 사본을 한 번씩 넘기고, 진행 상황은 끝나는 순서대로 출력)
+            workers = min(len(json_files), os.cpu_count() or 1)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self._worker_copy(),),
+            ) as ex:
+                futures = {ex.submit(_convert_path, json_path): json_path for json_path in json_files}
+                for future in as_completed(futures):
+                    json_path = futures[future]
+                    results[json_path] = doc, error = future.result()
+                    if error:
+                        print(f"  [오류] {json_path.name}: {error}")
+                    else:
+                        print(f"  변환 완료: {json_path.name}")
+        else:
+            for json_path in json_files:
                 print(f"  변환 중: {json_path.name}")
-                doc = self.convert_file(json_path)
-                documents.append(doc)
-            except Exception as e:
-                print(f"  [오류] {json_path.name}: {e}")
+                results[json_path] = doc, error = _build_or_error(self, json_path)
+                if error:
+                    print(f"  [오류] {json_path.name}: {error}")
+
+        # 결과는 파일 순서대로 모은다
+        documents = [results[p][0] for p in json_files if results[p][1] is None]
+        self.converted_documents.extend(documents)
 
         # 결과 저장
         self._save_converted_data(documents, output_dir)
 
         return documents
 
+    def _worker_copy(self) -> "DataConverter":
+        """워커 프로세스에 넘길 설정 사본 (변환 결과 목록은 제외)"""
+        template = copy.copy(self)
+        template.converted_documents = []
+        return template
+
     def _save_converted_data(self, documents: list[RAGDocument], output_dir: Path):
         """변환된 데이터 저장"""
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # 학생 프로필
-        profiles = [doc.profile.model_dump() for doc in documents]
-        with open(output_dir / "students.json", "w", encoding="utf-8") as f:
-            json.dump(profiles, f, ensure_ascii=False, indent=2)
-
-        # 탐구활동
-        all_research = []
+        # 문서마다 model_dump는 한 번만 하고 파일별로 나눠 담는다
+        # (mode="json"으로 JSON 기본 타입만 남기고, 하위 dict는 통합 문서와 공유)
+        profiles, all_research, all_saeteuk, all_docs = [], [], [], []
         for doc in documents:
-            for r in doc.research_activities:
-                all_research.append(r.model_dump())
-        with open(output_dir / "research.json", "w", encoding="utf-8") as f:
-            json.dump(all_research, f, ensure_ascii=False, indent=2)
+            d = doc.model_dump(mode="json")
+            profiles.append(d["profile"])
+            all_research.extend(d["research_activities"])
+            all_saeteuk.extend(d["saeteuk_examples"])
+            all_docs.append(d)
 
-        # 세특
-        all_saeteuk = []
-        for doc in documents:
-            for s in doc.saeteuk_examples:
-                all_saeteuk.append(s.model_dump())
-        with open(output_dir / "saeteuk.json", "w", encoding="utf-8") as f:
-            json.dump(all_saeteuk, f, ensure_ascii=False, indent=2)
-
-        # 통합 문서
-        all_docs = [doc.model_dump() for doc in documents]
-        with open(output_dir / "rag_documents.json", "w", encoding="utf-8") as f:
-            json.dump(all_docs, f, ensure_ascii=False, indent=2)
+        _write_json(output_dir / "students.json", profiles)  # 학생 프로필
+        _write_json(output_dir / "research.json", all_research)  # 탐구활동
+        _write_json(output_dir / "saeteuk.json", all_saeteuk)  # 세특
+        _write_json(output_dir / "rag_documents.json", all_docs)  # 통합 문서
 
         print(f"\n[저장 완료]")
         print(f"  - students.json: {len(profiles)}개 프로필")
         print(f"  - research.json: {len(all_research)}개 탐구활동")
         print(f"  - saeteuk.json: {len(all_saeteuk)}개 세특")
         print(f"  - rag_documents.json: 통합 문서")
+
+
+def _write_json(path: Path, data) -> None:
+    """orjson으로 직렬화해 한 번에 기록 (json.dump indent=2와 같은 형식)"""
+    path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+
+# 워커 프로세스마다 한 번 전달받는 변환기 (호출한 인스턴스의 설정 사본)
+_worker_converter: Optional[DataConverter] = None
+
+
+def _init_worker(converter: DataConverter) -> None:
+    global _worker_converter
+    _worker_converter = converter
+
+
+def _build_or_error(converter: DataConverter, json_path: Path) -> tuple[Optional[RAGDocument], Optional[str]]:
+    """파일 변환 -> (문서, 오류 메시지)"""
+    try:
+        return converter.build_document(json_path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _convert_path(json_path: Path) -> tuple[Optional[RAGDocument], Optional[str]]:
+    """워커 프로세스용 파일 변환"""
+    return _build_or_error(_worker_converter, json_path)
@@ -1,11 +1,27 @@
 """벡터 임베딩 생성 및 ChromaDB 인덱싱"""
 
-import json
+import hashlib
+import logging
+import random
+import sqlite3
+import time
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 import os
 
-from openai import OpenAI
+import numpy as np
+import orjson
+from openai import APIConnectionError, InternalServerError, OpenAI, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# 일시적인 실패로 보고 재시도하는 예외 (429, 5xx, 네트워크)
+_RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+# 학생 프로필이 없는 항목용 (읽기 전용으로만 사용)
+_NO_STUDENT: dict = {}
 
 # ChromaDB는 선택적 import
 try:
@@ -25,53 +41,173 @@ class RAGIndexer:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY가 필요합니다")
 
-        self.client = OpenAI(api_key=self.api_key)
+        # 재시도는 _embed_with_retry에서 일괄 처리 (SDK 내부 재시도와 겹치지 않도록)
+        self.client = OpenAI(api_key=self.api_key, max_retries=0)
         self.embedding_model = "text-embedding-ada-002"
+        self.embedding_dim = 1536  # 받은 벡터가 하나도 없을 때 빈 텍스트용 0벡터 차원
+        self.max_concurrency = 5  # 동시 임베딩 요청 수 (레이트 리밋 고려)
         self.db_path = Path(db_path)
+        self.cache_path = self.db_path / "emb_cache.sqlite"
 
         # ChromaDB 클라이언트
         if CHROMADB_AVAILABLE:
             self.db_path.mkdir(parents=True, exist_ok=True)
-            self.chroma_client = chromadb.PersistentClient(path=str(self.db_path))
+            self.chroma_client = chromadb.PersistentClient(
+                path=str(self.db_path),
+                settings=Settings(anonymized_telemetry=False),
+            )
         else:
             self.chroma_client = None
 
+    def _embed_with_retry(self, batch, max_attempts: int = 5, base_delay: float = 1.0):
+        """임베딩 요청 (일시적 실패는 지수 백오프로 재시도, Retry-After 우선)"""
+        for attempt in range(max_attempts):
+            try:
+                return self.client.embeddings.create(
+                    model=self.embedding_model,
+                    input=batch
+                )
+            except _RETRYABLE_ERRORS as e:
+                if attempt == max_attempts - 1:
+                    raise
+                delay = base_delay * 2 ** attempt
+                response = getattr(e, "response", None)
+                retry_after = response.headers.get("retry-after") if response is not None else None
+                try:
+                    delay = max(delay, float(retry_after))
+                except (TypeError, ValueError):
+                    pass
+                delay += random.uniform(0, base_delay)
+                logger.warning("임베딩 요청 재시도 (%d/%d): %.1f초 후 - %s", attempt + 1, max_attempts - 1, delay, e)
+                time.sleep(delay)
+
     def create_embedding(self, text: str) -> list[float]:
         """단일 텍스트 임베딩 생성"""
-        response = self.client.embeddings.create(
-            model=self.embedding_model,
-            input=text
-        )
+        response = self._embed_with_retry(text)
         return response.data[0].embedding
 
-    def create_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
-        """배치 임베딩 생성"""
+    def _cache_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.embedding_model}|{text}".encode("utf-8")).hexdigest()
+
+    def _open_cache(self) -> sqlite3.Connection:
+        """임베딩 캐시 DB 연결 (키: 모델+텍스트 해시, 값: float32 바이트)"""
+        self.db_path.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.cache_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB)")
+        return conn
+
+    def iter_embedding_batches(self, texts: list[str]) -> Iterator[tuple[list[int], np.ndarray]]:
+        """임베딩을 준비되는 대로 (입력 위치 목록, float32 벡터 행렬) 단위로 생성
+
+        캐시 적중분을 먼저 내보내고, 나머지는 캐시에 없는 텍스트만 여러 배치로 동시에 요청해
+        완료 순서대로 내보낸다.
+        """
         # OpenAI는 한 번에 최대 2048개 텍스트 처리 가능
-        embeddings = []
         batch_size = 100
 
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            response = self.client.embeddings.create(
-                model=self.embedding_model,
-                input=batch
-            )
-            embeddings.extend([d.embedding for d in response.data])
-            print(f"    임베딩 생성: {min(i + batch_size, len(texts))}/{len(texts)}")
-
+        # 빈 텍스트는 API로 보내지 않고 마지막에 0벡터로 채운다
+        blanks = [i for i, text in enumerate(texts) if not text or not text.strip()]
+        blank_set = set(blanks)
+        keys = [None if i in blank_set else self._cache_key(text) for i, text in enumerate(texts)]
+        dim = None
+        with closing(self._open_cache()) as conn:
+            # 캐시 조회 (SQLite 변수 개수 제한 때문에 나눠서 조회)
+            cached = {}
+            unique_keys = [key for key in dict.fromkeys(keys) if key is not None]
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                cached.update((key, np.frombuffer(vec, dtype=np.float32)) for key, vec in rows)
+
+            # 캐시 미스는 텍스트별로 한 번만 요청
+            hits: list[int] = []
+            positions: dict[str, list[int]] = {}
+            for i, key in enumerate(keys):
+                if key is None:
+                    continue
+                if key in cached:
+                    hits.append(i)
+                else:
+                    positions.setdefault(key, []).append(i)
+            miss_keys = list(positions)
+            miss_texts = [texts[positions[key][0]] for key in miss_keys]
+            if hits:
+                logger.info("임베딩 캐시: %d/%d", len(hits), len(texts))
+            for start in range(0, len(hits), 500):
+                chunk = hits[start:start + 500]
+                vectors = np.stack([cached[keys[i]] for i in chunk])
+                dim = vectors.shape[1]
+                yield chunk, vectors
+
+            batches = [(i, miss_texts[i:i + batch_size]) for i in range(0, len(miss_texts), batch_size)]
+
+            # 네트워크 대기 시간이 대부분이므로 스레드로 겹친다 (동시 요청 수 = 풀 크기)
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                futures = {
+                    executor.submit(self._embed_with_retry, batch): (i, len(batch))
+                    for i, batch in batches
+                }
+                done = 0
+                for future in as_completed(futures):
+                    i, size = futures[future]
+                    response = future.result()
+                    matrix = np.asarray([d.embedding for d in response.data], dtype=np.float32)
+                    batch_keys = miss_keys[i:i + size]
+                    # 배치마다 저장해 중간에 실패해도 받은 임베딩은 남긴다
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                        [(key, vec.tobytes()) for key, vec in zip(batch_keys, matrix)],
+                    )
+                    conn.commit()
+                    done += size
+                    logger.info("임베딩 생성: %d/%d", done, len(miss_texts))
+
+                    # 같은 텍스트가 여러 위치에 있으면 행을 복제해 내보낸다
+                    out_positions: list[int] = []
+                    rows: list[int] = []
+                    for row, key in enumerate(batch_keys):
+                        out_positions.extend(positions[key])
+                        rows.extend([row] * len(positions[key]))
+                    dim = matrix.shape[1]
+                    yield out_positions, matrix[rows]
+
+        if blanks:
+            logger.info("빈 텍스트 %d개는 0벡터로 대체", len(blanks))
+            yield blanks, np.zeros((len(blanks), dim or self.embedding_dim), dtype=np.float32)
+
+    def create_embeddings_batch(
+        self,
+        texts: list[str],
+        on_batch: Optional[Callable[[list[int], np.ndarray], None]] = None,
+    ) -> np.ndarray:
+        """배치 임베딩 생성
+
+        결과는 (텍스트 수, 차원) float32 행렬이며 행 순서는 입력 순서와 같다.
+        on_batch가 있으면 배치가 도착할 때마다 (입력 위치 목록, 벡터)로 호출한다.
+        """
+        embeddings = None
+        for positions, vectors in self.iter_embedding_batches(texts):
+            if embeddings is None:
+                # 차원은 첫 벡터를 보고 정한다 (모델마다 다름)
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            embeddings[positions] = vectors
+            if on_batch is not None:
+                on_batch(positions, vectors)
+
+        if embeddings is None:
+            return np.empty((0, 0), dtype=np.float32)
         return embeddings
 
-    def index_from_metadata(self, metadata_dir: Path):
-        """메타데이터 디렉토리에서 인덱싱"""
+    def index_from_metadata(self, metadata_dir: Path, force_rebuild: bool = False):
+        """메타데이터 디렉토리에서 인덱싱 (force_rebuild면 컬렉션을 지우고 새로 생성)"""
         metadata_dir = Path(metadata_dir)
 
         # 데이터 로드
-        with open(metadata_dir / "students.json", "r", encoding="utf-8") as f:
-            students = json.load(f)
-        with open(metadata_dir / "research.json", "r", encoding="utf-8") as f:
-            research_list = json.load(f)
-        with open(metadata_dir / "saeteuk.json", "r", encoding="utf-8") as f:
-            saeteuk_list = json.load(f)
+        students = orjson.loads((metadata_dir / "students.json").read_bytes())
+        research_list = orjson.loads((metadata_dir / "research.json").read_bytes())
+        saeteuk_list = orjson.loads((metadata_dir / "saeteuk.json").read_bytes())
 
         print(f"\n[인덱싱 시작]")
         print(f"  학생: {len(students)}명")
@@ -83,44 +219,38 @@ class RAGIndexer:
 
         # 탐구활동 인덱싱
         print(f"\n[탐구활동 임베딩 생성]")
+        research_ids = [r["id"] for r in research_list]
         research_texts = []
-        research_ids = []
         research_metadata = []
 
         for r in research_list:
+            # 학생 조회는 항목당 한 번만
+            student = student_map.get(r["student_id"], _NO_STUDENT)
             # RAG 텍스트 생성
-            text = self._create_research_text(r, student_map.get(r["student_id"], {}))
-            research_texts.append(text)
-            research_ids.append(r["id"])
-            research_metadata.append(self._create_research_metadata(r, student_map.get(r["student_id"], {})))
+            research_texts.append(self._create_research_text(r, student))
+            research_metadata.append(self._create_research_metadata(r, student))
 
-        research_embeddings = self.create_embeddings_batch(research_texts)
+        research_embeddings = self._embed_and_store(
+            "research", research_ids, research_texts, research_metadata, force_rebuild
+        )
 
         # 세특 인덱싱
         print(f"\n[세특 임베딩 생성]")
+        saeteuk_ids = [s["id"] for s in saeteuk_list]
         saeteuk_texts = []
-        saeteuk_ids = []
         saeteuk_metadata = []
 
         for s in saeteuk_list:
-            text = self._create_saeteuk_text(s, student_map.get(s["student_id"], {}))
-            saeteuk_texts.append(text)
-            saeteuk_ids.append(s["id"])
-            saeteuk_metadata.append(self._create_saeteuk_metadata(s, student_map.get(s["student_id"], {})))
+            student = student_map.get(s["student_id"], _NO_STUDENT)
+            saeteuk_texts.append(self._create_saeteuk_text(s, student))
+            saeteuk_metadata.append(self._create_saeteuk_metadata(s, student))
 
-        saeteuk_embeddings = self.create_embeddings_batch(saeteuk_texts)
-
-        # ChromaDB에 저장
-        if self.chroma_client:
-            self._save_to_chromadb(
-                "research", research_ids, research_texts, research_embeddings, research_metadata
-            )
-            self._save_to_chromadb(
-                "saeteuk", saeteuk_ids, saeteuk_texts, saeteuk_embeddings, saeteuk_metadata
-            )
+        saeteuk_embeddings = self._embed_and_store(
+            "saeteuk", saeteuk_ids, saeteuk_texts, saeteuk_metadata, force_rebuild
+        )
 
-        # JSON으로도 저장 (백업)
-        self._save_embeddings_json(
+        # 임베딩 행렬도 저장 (백업)
+        self._save_embeddings_backup(
             metadata_dir,
             research_list, research_embeddings,
             saeteuk_list, saeteuk_embeddings
@@ -195,56 +325,70 @@ class RAGIndexer:
             "school_type": student.get("school_type", ""),
         }
 
-    def _save_to_chromadb(
+    def _embed_and_store(
         self,
         collection_name: str,
         ids: list[str],
         documents: list[str],
-        embeddings: list[list[float]],
-        metadatas: list[dict]
-    ):
-        """ChromaDB에 저장"""
-        # 기존 컬렉션 삭제 후 재생성
-        try:
-            self.chroma_client.delete_collection(collection_name)
-        except:
-            pass
-
-        collection = self.chroma_client.create_collection(
+        metadatas: list[dict],
+        force_rebuild: bool = False
+    ) -> np.ndarray:
+        """임베딩을 생성하면서 도착한 배치를 바로 ChromaDB에 upsert"""
+        if not self.chroma_client:
+            return self.create_embeddings_batch(documents)
+
+        collection = self._prepare_collection(collection_name, ids, force_rebuild)
+        stored = 0
+
+        def upsert(positions: list[int], vectors: np.ndarray):
+            nonlocal stored
+            collection.upsert(
+                ids=[ids[i] for i in positions],
+                documents=[documents[i] for i in positions],
+                embeddings=vectors.tolist(),
+                metadatas=[metadatas[i] for i in positions]
+            )
+            stored += len(positions)
+
+        embeddings = self.create_embeddings_batch(documents, on_batch=upsert)
+        print(f"    ChromaDB '{collection_name}' 컬렉션: {stored}개 문서")
+        return embeddings
+
+    def _prepare_collection(self, collection_name: str, ids: list[str], force_rebuild: bool = False):
+        """ChromaDB 컬렉션 준비 (기존 컬렉션은 id 기준 upsert로 갱신)"""
+        if force_rebuild:
+            # 기존 컬렉션 삭제 후 재생성 (버전에 따라 list_collections가 이름 또는 Collection 반환)
+            existing = {getattr(c, "name", c) for c in self.chroma_client.list_collections()}
+            if collection_name in existing:
+                self.chroma_client.delete_collection(collection_name)
+
+        collection = self.chroma_client.get_or_create_collection(
             name=collection_name,
             metadata={"description": f"RAG {collection_name} collection"}
         )
 
-        collection.add(
-            ids=ids,
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas
-        )
+        # 이번 데이터에 없는 문서는 제거 (upsert만으로는 남아 있음)
+        current = set(ids)
+        stale = [doc_id for doc_id in collection.get(include=[])["ids"] if doc_id not in current]
+        for start in range(0, len(stale), 500):
+            collection.delete(ids=stale[start:start + 500])
 
-        print(f"    ChromaDB '{collection_name}' 컬렉션: {len(ids)}개 문서")
+        return collection
 
-    def _save_embeddings_json(
+    def _save_embeddings_backup(
         self,
         output_dir: Path,
         research_list: list,
-        research_embeddings: list,
+        research_embeddings: np.ndarray,
         saeteuk_list: list,
-        saeteuk_embeddings: list
+        saeteuk_embeddings: np.ndarray
     ):
-        """임베딩을 JSON으로 저장 (백업)"""
-        # 탐구활동 + 임베딩
-        for i, r in enumerate(research_list):
-            r["embedding"] = research_embeddings[i]
-
-        with open(output_dir / "research_with_embeddings.json", "w", encoding="utf-8") as f:
-            json.dump(research_list, f, ensure_ascii=False)
-
-        # 세특 + 임베딩
-        for i, s in enumerate(saeteuk_list):
-            s["embedding"] = saeteuk_embeddings[i]
+        """임베딩을 .npy로 저장 (백업)
 
-        with open(output_dir / "saeteuk_with_embeddings.json", "w", encoding="utf-8") as f:
-            json.dump(saeteuk_list, f, ensure_ascii=False)
+        i번째 행이 research.json / saeteuk.json 목록의 i번째 항목에 대응한다.
+        메타데이터 JSON은 그대로 두고, 읽을 때는 np.load(..., mmap_mode="r")로 필요한 행만 본다.
+        """
+        np.save(output_dir / "research_embeddings.npy", np.asarray(research_embeddings, dtype=np.float32))
+        np.save(output_dir / "saeteuk_embeddings.npy", np.asarray(saeteuk_embeddings, dtype=np.float32))
 
-        print(f"    JSON 백업 저장 완료")
+        print(f"    임베딩 백업 저장 완료")
@@ -1,5 +1,8 @@
 """생기부 로드맵 레포트 생성기"""
 
+import functools
+import re
+from collections import Counter
 from dataclasses import dataclass
 from typing import Optional
 from datetime import datetime
@@ -7,6 +10,23 @@ from .searcher import RAGSearcher, SearchResult
 from .text_formatter import TextFormatter
 
 
+# 제목 단어 분리 (공백과 , . 기준)
+_WORD_RE = re.compile(r"[^\s,.]+")
+# 과목명 키워드 → 학기 (앞에 있을수록 우선)
+_SUBJECT_TERM_MAP = (
+    ("통합과학", "1-1"),
+    ("통합사회", "1-1"),
+    ("한국사", "1-2"),
+    ("경제", "2-2"),
+    ("정치와법", "2-2"),
+    ("세계지리", "3-1"),
+    ("진로", "2-1"),
+    ("사회문화", "2-2"),
+    ("생활과윤리", "3-1"),
+)
+_STOPWORDS = frozenset({"통한", "대한", "관한", "위한", "따른", "미치는", "영향", "분석", "연구", "탐구", "의", "와", "과", "및", "을", "를", "이", "가"})
+
+
 @dataclass
 class RoadmapReport:
     """로드맵 레포트"""
@@ -21,6 +41,16 @@ class RoadmapReport:
 class ReportGenerator:
     """RAG 기반 생기부 로드맵 레포트 생성기"""
 
+    # 레포트 학기 표시 이름 (출력 순서)
+    TERM_NAMES = {
+        "1-1": "1학년 1학기",
+        "1-2": "1학년 2학기",
+        "2-1": "2학년 1학기",
+        "2-2": "2학년 2학기",
+        "3-1": "3학년 1학기",
+        "3-2": "3학년 2학기",
+    }
+
     def __init__(self, metadata_dir: str = "data/metadata", enable_formatting: bool = True):
         self.searcher = RAGSearcher(metadata_dir=metadata_dir)
         self.enable_formatting = enable_formatting
@@ -61,27 +91,26 @@ class ReportGenerator:
 
     def _merge_roadmaps(self, results: list[SearchResult]) -> dict:
         """여러 합격자의 로드맵을 시기별로 통합"""
-        merged = {}
-        terms = ["1-1", "1-2", "2-1", "2-2", "3-1", "3-2"]
-
-        for term in terms:
-            merged[term] = {
-                "research_topics": [],
-                "saeteuk_examples": []
-            }
+        # 학기별 버킷 (TERM_NAMES 순서, 여기 없는 학기는 무시)
+        merged = {
+            term: {"research_topics": [], "saeteuk_examples": []}
+            for term in self.TERM_NAMES
+        }
 
         for result in results:
+            student_label = f"{result.university} {result.department}"
+
             # 탐구활동 수집
             for r in result.research_activities:
-                term = r.get("term", "")
-                if term in merged:
+                bucket = merged.get(r.get("term", ""))
+                if bucket is not None:
                     topic = {
                         "subject": r.get("subject", ""),
                         "title": r.get("title", ""),
-                        "student": f"{result.university} {result.department}",
+                        "student": student_label,
                         "nesin": result.nesin_average
                     }
-                    merged[term]["research_topics"].append(topic)
+                    bucket["research_topics"].append(topic)
 
             # 세특 예시 수집
             for s in result.saeteuk_examples:
@@ -92,35 +121,41 @@ class ReportGenerator:
 
                 # 학년 추정 (과목명에서)
                 term = self._guess_term_from_subject(subject)
-                if term and term in merged:
+                bucket = merged.get(term) if term else None
+                if bucket is not None:
                     saeteuk = {
                         "subject": subject,
                         "content": content[:500] + "..." if len(content) > 500 else content,
                         "highlights": highlights[:5],
                         "student": f"{result.university}"
                     }
-                    merged[term]["saeteuk_examples"].append(saeteuk)
+                    bucket["saeteuk_examples"].append(saeteuk)
 
         # 중복 제거 및 정렬
-        for term in terms:
+        for bucket in merged.values():
             # 탐구활동 중복 제거 (제목 기준)
             seen_titles = set()
             unique_topics = []
-            for t in merged[term]["research_topics"]:
+            for t in bucket["research_topics"]:
                 title_key = t["title"][:30]
                 if title_key not in seen_titles:
                     seen_titles.add(title_key)
                     unique_topics.append(t)
-            merged[term]["research_topics"] = unique_topics[:5]  # 최대 5개
+                    if len(unique_topics) == 5:  # 최대 5개
+                        break
+            bucket["research_topics"] = unique_topics
 
             # 세특 중복 제거
             seen_subjects = set()
             unique_saeteuk = []
-            for s in merged[term]["saeteuk_examples"]:
-                if s["subject"] not in seen_subjects:
-                    seen_subjects.add(s["subject"])
+            for s in bucket["saeteuk_examples"]:
+                subject = s["subject"]
+                if subject not in seen_subjects:
+                    seen_subjects.add(subject)
                     unique_saeteuk.append(s)
-            merged[term]["saeteuk_examples"] = unique_saeteuk[:3]  # 최대 3개
+                    if len(unique_saeteuk) == 3:  # 최대 3개
+                        break
+            bucket["saeteuk_examples"] = unique_saeteuk
 
         # OpenAI로 텍스트 포맷팅 적용
         if self.enable_formatting and self.formatter:
@@ -159,8 +194,10 @@ class ReportGenerator:
 
         return merged
 
-    def _guess_term_from_subject(self, subject: str) -> Optional[str]:
-        """과목명에서 학기 추정"""
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _guess_term_from_subject(subject: str) -> Optional[str]:
+        """과목명에서 학기 추정 (같은 과목명은 캐시 사용)"""
         # 학년 표시가 있는 경우
         if "1학년" in subject or "1학기" in subject:
             return "1-1"
@@ -170,19 +207,7 @@ class ReportGenerator:
             return "3-1"
 
         # 일반적인 과목 매핑
-        subject_term_map = {
-            "통합과학": "1-1",
-            "통합사회": "1-1",
-            "한국사": "1-2",
-            "경제": "2-2",
-            "정치와법": "2-2",
-            "세계지리": "3-1",
-            "진로": "2-1",
-            "사회문화": "2-2",
-            "생활과윤리": "3-1",
-        }
-
-        for key, term in subject_term_map.items():
+        for key, term in _SUBJECT_TERM_MAP:
             if key in subject:
                 return term
 
@@ -219,22 +244,23 @@ class ReportGenerator:
         if not results:
             return ["매칭되는 합격자 데이터가 없습니다."]
 
+        # 평균 내신 / 합격 대학 / 탐구 제목을 한 번에 수집
+        nesin_total = 0.0
+        universities = {}  # 검색 순위 순서를 유지하는 중복 제거
+        all_titles = []
+        for r in results:
+            nesin_total += r.nesin_average
+            universities[r.university] = None
+            all_titles.extend(act.get("title", "") for act in r.research_activities)
+
         # 평균 내신
-        avg_nesin = sum(r.nesin_average for r in results) / len(results)
+        avg_nesin = nesin_total / len(results)
         insights.append(f"유사 합격자 평균 내신: {avg_nesin:.2f}등급")
 
         # 합격 대학 분포
-        universities = [r.university for r in results]
-        univ_set = set(universities)
-        insights.append(f"합격 대학: {', '.join(univ_set)}")
+        insights.append(f"합격 대학: {', '.join(universities)}")
 
         # 공통 탐구 키워드
-        all_titles = []
-        for r in results:
-            for act in r.research_activities:
-                all_titles.append(act.get("title", ""))
-
-        # 자주 등장하는 키워드 추출
         keywords = self._extract_keywords(all_titles)
         if keywords:
             insights.append(f"자주 등장하는 탐구 키워드: {', '.join(keywords[:5])}")
@@ -251,21 +277,18 @@ class ReportGenerator:
 
     def _extract_keywords(self, titles: list[str]) -> list[str]:
         """제목에서 키워드 추출"""
-        word_count = {}
-        stopwords = {"통한", "대한", "관한", "위한", "따른", "미치는", "영향", "분석", "연구", "탐구", "의", "와", "과", "및", "을", "를", "이", "가"}
-
+        word_count = Counter()
         for title in titles:
-            words = title.replace(",", " ").replace(".", " ").split()
-            for word in words:
-                if len(word) >= 2 and word not in stopwords:
-                    word_count[word] = word_count.get(word, 0) + 1
-
-        sorted_words = sorted(word_count.items(), key=lambda x: x[1], reverse=True)
-        return [w[0] for w in sorted_words[:10]]
+            word_count.update(
+                word for word in _WORD_RE.findall(title)
+                if len(word) >= 2 and word not in _STOPWORDS
+            )
+        return [word for word, _ in word_count.most_common(10)]
 
     def to_markdown(self, report: RoadmapReport) -> str:
         """마크다운 형식 레포트 생성"""
         lines = []
+        query = report.query_info
 
         # 헤더
         lines.append("# 📚 맞춤형 생기부 로드맵 레포트")
@@ -274,9 +297,9 @@ class ReportGenerator:
 
         # 검색 조건
         lines.append("## 📋 분석 조건")
-        lines.append(f"- **내신 등급대**: {report.query_info['nesin_range']}")
-        lines.append(f"- **학교 유형**: {report.query_info['school_type']}")
-        lines.append(f"- **희망 계열**: {report.query_info['major_field']}")
+        lines.append(f"- **내신 등급대**: {query['nesin_range']}")
+        lines.append(f"- **학교 유형**: {query['school_type']}")
+        lines.append(f"- **희망 계열**: {query['major_field']}")
         lines.append("")
 
         # 핵심 인사이트
@@ -301,16 +324,7 @@ class ReportGenerator:
         # 학기별 로드맵
         lines.append("## 📅 학기별 탐구 로드맵")
 
-        term_names = {
-            "1-1": "1학년 1학기",
-            "1-2": "1학년 2학기",
-            "2-1": "2학년 1학기",
-            "2-2": "2학년 2학기",
-            "3-1": "3학년 1학기",
-            "3-2": "3학년 2학기",
-        }
-
-        for term, name in term_names.items():
+        for term, name in self.TERM_NAMES.items():
             data = report.roadmap_by_term.get(term, {})
             topics = data.get("research_topics", [])
             saeteuks = data.get("saeteuk_examples", [])
@@ -342,24 +356,25 @@ class ReportGenerator:
     def to_html(self, report: RoadmapReport) -> str:
         """HTML 형식 레포트 생성"""
         html = []
+        query = report.query_info
 
-        html.append("""
+        html.append(f"""
         <div class="report">
             <h1>📚 맞춤형 생기부 로드맵 레포트</h1>
-            <p class="generated-at">생성일: {generated_at}</p>
-        """.format(generated_at=report.generated_at))
+            <p class="generated-at">생성일: {report.generated_at}</p>
+        """)
 
         # 검색 조건
-        html.append("""
+        html.append(f"""
             <section class="query-info">
                 <h2>📋 분석 조건</h2>
                 <ul>
-                    <li><strong>내신 등급대:</strong> {nesin_range}</li>
-                    <li><strong>학교 유형:</strong> {school_type}</li>
-                    <li><strong>희망 계열:</strong> {major_field}</li>
+                    <li><strong>내신 등급대:</strong> {query['nesin_range']}</li>
+                    <li><strong>학교 유형:</strong> {query['school_type']}</li>
+                    <li><strong>희망 계열:</strong> {query['major_field']}</li>
                 </ul>
             </section>
-        """.format(**report.query_info))
+        """)
 
         # 핵심 인사이트
         html.append('<section class="insights"><h2>💡 핵심 인사이트</h2><ul>')
@@ -389,13 +404,7 @@ class ReportGenerator:
         # 학기별 로드맵
         html.append('<section class="roadmap"><h2>📅 학기별 탐구 로드맵</h2>')
 
-        term_names = {
-            "1-1": "1학년 1학기", "1-2": "1학년 2학기",
-            "2-1": "2학년 1학기", "2-2": "2학년 2학기",
-            "3-1": "3학년 1학기", "3-2": "3학년 2학기",
-        }
-
-        for term, name in term_names.items():
+        for term, name in self.TERM_NAMES.items():
             data = report.roadmap_by_term.get(term, {})
             topics = data.get("research_topics", [])
             saeteuks = data.get("saeteuk_examples", [])
@@ -1,10 +1,15 @@
 """RAG 검색 시스템 - 유사 합격자 탐구 로드맵 검색"""
 
-import json
+import functools
+import mmap
+from collections import defaultdict
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass
 
+import numpy as np
+import orjson
+
 
 @dataclass
 class SearchQuery:
@@ -28,42 +33,98 @@ class SearchResult:
     saeteuk_examples: list  # 세특 예시
 
 
+def _load_json(path: Path):
+    """JSON 파일 로드 (파일을 메모리 매핑해 bytes 사본 없이 파싱)"""
+    with open(path, "rb") as f:
+        if path.stat().st_size == 0:
+            # 빈 파일은 매핑할 수 없으므로 orjson이 바로 오류를 내게 한다
+            return orjson.loads(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+
+def _encode_column(values: list) -> tuple[list, np.ndarray]:
+    """값 목록 -> (고유값 목록, 항목별 고유값 인덱스 배열)"""
+    codes: dict = {}
+    ids = np.fromiter(
+        (codes.setdefault(v, len(codes)) for v in values), dtype=np.intp, count=len(values)
+    )
+    return list(codes), ids
+
+
 class RAGSearcher:
     """RAG 기반 합격자 검색"""
 
+    # 매칭 점수 가중치
+    MATCH_WEIGHTS = {
+        "major_field": 0.5,  # 계열 매칭이 가장 중요
+        "nesin_range": 0.3,  # 등급대
+        "school_type": 0.2   # 학교 유형
+    }
+
+    # 유사 과목 그룹 (과목명에 그룹 단어가 포함되면 해당 그룹)
+    SUBJECT_GROUPS = (
+        ("영어", "영어독해", "영어작문", "영어회화"),
+        ("수학", "수학1", "수학2", "미적분", "확률과통계", "기하"),
+        ("국어", "문학", "독서", "화법과작문", "언어와매체"),
+        ("과학", "물리", "화학", "생명", "지구과학", "통합과학"),
+        ("사회", "한국사", "세계사", "동아시아사", "정치", "경제", "사회문화"),
+        ("진로", "진로활동", "진로탐구"),
+    )
+
     def __init__(self, metadata_dir: str = "data/metadata"):
         self.metadata_dir = Path(metadata_dir)
         self._load_data()
 
     def _load_data(self):
         """데이터 로드"""
-        with open(self.metadata_dir / "students.json", "r", encoding="utf-8") as f:
-            self.students = json.load(f)
-
-        with open(self.metadata_dir / "research.json", "r", encoding="utf-8") as f:
-            self.research = json.load(f)
-
-        with open(self.metadata_dir / "saeteuk.json", "r", encoding="utf-8") as f:
-            self.saeteuk = json.load(f)
+        self.students = _load_json(self.metadata_dir / "students.json")
+        self.research = _load_json(self.metadata_dir / "research.json")
+        self.saeteuk = _load_json(self.metadata_dir / "saeteuk.json")
 
         # 학생 ID별 인덱스 생성
         self.student_map = {s["id"]: s for s in self.students}
 
         # 학생별 탐구활동 그룹핑
-        self.research_by_student = {}
+        research_by_student = defaultdict(list)
         for r in self.research:
-            sid = r["student_id"]
-            if sid not in self.research_by_student:
-                self.research_by_student[sid] = []
-            self.research_by_student[sid].append(r)
+            research_by_student[r["student_id"]].append(r)
+        self.research_by_student = dict(research_by_student)
+
+        # 학생별 시기 그룹핑 (로드맵 출력마다 다시 묶지 않도록 미리 계산)
+        self.research_by_student_term = {}
+        for sid, rows in self.research_by_student.items():
+            by_term = {}
+            for r in rows:
+                by_term.setdefault(r.get("term", "미상"), []).append(r)
+            self.research_by_student_term[sid] = by_term
+        self.sorted_terms_by_student = {
+            sid: sorted(by_term) for sid, by_term in self.research_by_student_term.items()
+        }
 
         # 학생별 세특 그룹핑
-        self.saeteuk_by_student = {}
+        saeteuk_by_student = defaultdict(list)
         for s in self.saeteuk:
-            sid = s["student_id"]
-            if sid not in self.saeteuk_by_student:
-                self.saeteuk_by_student[sid] = []
-            self.saeteuk_by_student[sid].append(s)
+            saeteuk_by_student[s["student_id"]].append(s)
+        self.saeteuk_by_student = dict(saeteuk_by_student)
+
+        # 학생별 세특 과목 키 (소문자 과목명, 유사 과목 그룹), 세특 목록과 같은 순서
+        # 세특 dict는 레포트로 그대로 넘어가므로 필드를 추가하지 않고 따로 둔다
+        self.saeteuk_subjects_by_student = {
+            sid: self._subject_keys(rows) for sid, rows in self.saeteuk_by_student.items()
+        }
+
+        # 매칭 점수는 (계열, 등급대, 학교 유형)에만 의존하므로 열별로 고유값 코드 배열을 만들어 두고
+        # 검색 시에는 고유값마다 한 번만 매칭한 뒤 배열 연산으로 전체 학생 점수를 계산한다
+        self.major_values, self.major_ids = _encode_column(
+            [s.get("major_field") for s in self.students]
+        )
+        self.nesin_values, self.nesin_ids = _encode_column(
+            [s.get("nesin_range") for s in self.students]
+        )
+        self.school_values, self.school_ids = _encode_column(
+            [s.get("school_type") for s in self.students]
+        )
 
     def search(
         self,
@@ -79,32 +140,54 @@ class RAGSearcher:
             major_field=major_field
         )
 
-        # 각 학생별 매칭 점수 계산
-        scored_students = []
-        for student in self.students:
-            score = self._calculate_match_score(student, query)
-            if score > 0:
-                scored_students.append((student, score))
+        scores = self._score_students(query)
 
-        # 점수순 정렬
-        scored_students.sort(key=lambda x: x[1], reverse=True)
+        # 점수순 상위 K개 (같은 점수는 원래 학생 순서)
+        top_k = max(top_k, 0)
+        candidates = np.flatnonzero(scores > 0)
+        if 0 < top_k < len(candidates):
+            # K번째 점수를 O(N) 선택으로 구한 뒤 그 이상인 후보만 정렬 (동점 포함)
+            kth = np.partition(-scores[candidates], top_k - 1)[top_k - 1]
+            candidates = candidates[-scores[candidates] <= kth]
+        order = np.argsort(-scores[candidates], kind="stable")[:top_k]
 
         # 상위 K개 결과 반환
         results = []
-        for student, score in scored_students[:top_k]:
-            result = self._build_result(student, score)
+        for i in candidates[order]:
+            result = self._build_result(self.students[i], float(scores[i]))
             results.append(result)
 
         return results
 
+    def _score_students(self, query: SearchQuery) -> np.ndarray:
+        """전체 학생 매칭 점수 배열 (_calculate_match_score와 같은 값)"""
+        weights = self.MATCH_WEIGHTS
+
+        # 열별 고유값 매칭 (값이 비어 있으면 0)
+        major = np.array([
+            1.0 if v and self._match_major_field(v, query.major_field) else 0.0
+            for v in self.major_values
+        ])
+        nesin = np.array([
+            self._match_nesin_range(v, query.nesin_range) if v else 0.0
+            for v in self.nesin_values
+        ])
+        school = np.array([
+            1.0 if v and self._match_school_type(v, query.school_type) else 0.0
+            for v in self.school_values
+        ])
+
+        # _calculate_match_score와 같은 순서로 더해 부동소수점 결과를 맞춘다
+        return (
+            weights["major_field"] * major[self.major_ids]
+            + weights["nesin_range"] * nesin[self.nesin_ids]
+            + weights["school_type"] * school[self.school_ids]
+        )
+
     def _calculate_match_score(self, student: dict, query: SearchQuery) -> float:
         """매칭 점수 계산 (0~1)"""
         score = 0.0
-        weights = {
-            "major_field": 0.5,  # 계열 매칭이 가장 중요
-            "nesin_range": 0.3,  # 등급대
-            "school_type": 0.2   # 학교 유형
-        }
+        weights = self.MATCH_WEIGHTS
 
         # 계열 매칭
         if student.get("major_field"):
@@ -198,16 +281,39 @@ class RAGSearcher:
             saeteuk_examples=saeteuk_list
         )
 
-    def _find_matching_saeteuk(self, research: dict, saeteuk_list: list) -> Optional[dict]:
-        """탐구활동과 매칭되는 세특 찾기"""
+    def _subject_keys(self, saeteuk_list: list) -> list[tuple[str, int]]:
+        """세특 목록 -> [(소문자 과목명, 유사 과목 그룹 비트마스크)]"""
+        keys = []
+        for saeteuk in saeteuk_list:
+            subject = saeteuk.get("subject", "").lower()
+            keys.append((subject, self._subject_group_mask(subject)))
+        return keys
+
+    def _saeteuk_subjects(self, result: SearchResult) -> list[tuple[str, int]]:
+        """결과 세특의 과목 키 (로드 시 계산한 목록이면 재사용)"""
+        sid = result.student_id
+        if result.saeteuk_examples is self.saeteuk_by_student.get(sid):
+            return self.saeteuk_subjects_by_student[sid]
+        return self._subject_keys(result.saeteuk_examples)
+
+    def _find_matching_saeteuk(
+        self,
+        research: dict,
+        saeteuk_list: list,
+        subject_keys: Optional[list[tuple[str, int]]] = None
+    ) -> Optional[dict]:
+        """탐구활동과 매칭되는 세특 찾기 (subject_keys: 세특 목록과 같은 순서의 과목 키)"""
         research_subject = research.get("subject", "").lower()
         research_term = research.get("term", "")
 
+        research_groups = self._subject_group_mask(research_subject)
+        if subject_keys is None:
+            subject_keys = self._subject_keys(saeteuk_list)
+
         best_match = None
         best_score = 0
 
-        for saeteuk in saeteuk_list:
-            saeteuk_subject = saeteuk.get("subject", "").lower()
+        for saeteuk, (saeteuk_subject, saeteuk_groups) in zip(saeteuk_list, subject_keys):
             score = 0
 
             # 과목명 매칭
@@ -216,32 +322,42 @@ class RAGSearcher:
                 if research_subject in saeteuk_subject or saeteuk_subject in research_subject:
                     score += 10
                 # 유사 과목 (예: 영어, 영어독해작문)
-                elif self._similar_subject(research_subject, saeteuk_subject):
+                elif research_groups & saeteuk_groups:
                     score += 5
 
             if score > best_score:
                 best_score = score
                 best_match = saeteuk
+                if best_score >= 10:
+                    break  # 더 높은 점수는 없음
 
         return best_match if best_score > 0 else None
 
     def _similar_subject(self, subj1: str, subj2: str) -> bool:
         """유사 과목 판단"""
-        subject_groups = [
-            ["영어", "영어독해", "영어작문", "영어회화"],
-            ["수학", "수학1", "수학2", "미적분", "확률과통계", "기하"],
-            ["국어", "문학", "독서", "화법과작문", "언어와매체"],
-            ["과학", "물리", "화학", "생명", "지구과학", "통합과학"],
-            ["사회", "한국사", "세계사", "동아시아사", "정치", "경제", "사회문화"],
-            ["진로", "진로활동", "진로탐구"],
-        ]
-
-        for group in subject_groups:
-            matches1 = any(g in subj1 for g in group)
-            matches2 = any(g in subj2 for g in group)
-            if matches1 and matches2:
-                return True
-        return False
+        return bool(self._subject_group_mask(subj1) & self._subject_group_mask(subj2))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _subject_group_mask(subject: str) -> int:
+        """과목이 속한 유사 과목 그룹 비트마스크 (같은 과목명은 캐시 사용)"""
+        mask = 0
+        for gid, group in enumerate(RAGSearcher.SUBJECT_GROUPS):
+            if any(g in subject for g in group):
+                mask |= 1 << gid
+        return mask
+
+    def _research_by_term(self, result: SearchResult) -> tuple[dict, list]:
+        """결과의 시기별 탐구활동 (시기 -> 목록, 정렬된 시기 목록)"""
+        sid = result.student_id
+        if sid in self.research_by_student_term:
+            return self.research_by_student_term[sid], self.sorted_terms_by_student[sid]
+
+        # 로드 시 인덱스에 없는 학생은 결과 목록으로 직접 그룹핑
+        by_term = {}
+        for r in result.research_activities:
+            by_term.setdefault(r.get("term", "미상"), []).append(r)
+        return by_term, sorted(by_term)
 
     def format_roadmap(self, result: SearchResult) -> str:
         """로드맵 포맷팅"""
@@ -253,15 +369,10 @@ class RAGSearcher:
         lines.append(f"{'='*60}")
 
         # 시기별 탐구활동 그룹핑
-        by_term = {}
-        for r in result.research_activities:
-            term = r.get("term", "미상")
-            if term not in by_term:
-                by_term[term] = []
-            by_term[term].append(r)
+        by_term, terms = self._research_by_term(result)
 
         lines.append("\n[시기별 탐구 로드맵]")
-        for term in sorted(by_term.keys()):
+        for term in terms:
             lines.append(f"\n  {term}학기:")
             for r in by_term[term]:
                 subject = r.get("subject", "")
@@ -295,19 +406,15 @@ class RAGSearcher:
         lines.append(f"{'='*70}")
 
         # 시기별 탐구활동 그룹핑
-        by_term = {}
-        for r in result.research_activities:
-            term = r.get("term", "미상")
-            if term not in by_term:
-                by_term[term] = []
-            by_term[term].append(r)
+        by_term, terms = self._research_by_term(result)
 
         # 사용된 세특 추적
         used_saeteuk_ids = set()
+        saeteuk_subjects = self._saeteuk_subjects(result)
 
         lines.append("\n[학년별 탐구 로드맵 + 세특 예시]")
 
-        for term in sorted(by_term.keys()):
+        for term in terms:
             grade = term.split("-")[0] if "-" in term else term
             lines.append(f"\n{'─'*70}")
             lines.append(f"  📚 {term}학기")
@@ -320,7 +427,9 @@ class RAGSearcher:
                 lines.append(f"\n  ▶ [{subject}] {title}")
 
                 # 해당 탐구와 매칭되는 세특 찾기
-                matching_saeteuk = self._find_matching_saeteuk(r, result.saeteuk_examples)
+                matching_saeteuk = self._find_matching_saeteuk(
+                    r, result.saeteuk_examples, saeteuk_subjects
+                )
                 if matching_saeteuk and matching_saeteuk.get("id") not in used_saeteuk_ids:
                     used_saeteuk_ids.add(matching_saeteuk.get("id"))
                     saeteuk_subject = matching_saeteuk.get("subject", "")
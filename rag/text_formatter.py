@@ -1,9 +1,57 @@
 """OpenAI를 사용한 텍스트 포맷팅"""
 
+import functools
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from openai import OpenAI
 from typing import Optional
 
+# 마침표, 쉼표 뒤에 바로 글자가 붙은 경우
+_PERIOD_RE = re.compile(r'\.(?=[가-힣A-Za-z])')
+_COMMA_RE = re.compile(r',(?=[가-힣A-Za-z])')
+
+# 한글 어절 (띄어쓰기 상태 판별용)
+_HANGUL_RUN_RE = re.compile(r'[가-힣]+')
+
+# 이미 띄어쓰기가 된 텍스트로 보는 기준 (정상 어절은 대개 2~5자, 길어도 7자 이내)
+_MAX_RUN_LENGTH = 7  # 붙어 있는 한글 최대 길이 (한 구간이라도 넘으면 교정)
+_LONG_RUN_LENGTH = 6  # 붙여 쓴 것으로 의심되는 어절 길이
+_MAX_LONG_RUN_RATIO = 0.2  # 의심 어절에 속한 한글 글자 비율
+_MAX_MEAN_RUN_LENGTH = 4.0  # 한글 어절 평균 길이
+_MAX_SINGLE_RATIO = 0.5  # 한 글자 어절 비율 (글자마다 띄어진 경우)
+
+
+def _needs_formatting(text: str) -> bool:
+    """띄어쓰기 교정(API 호출)이 필요한 텍스트인지 판별
+
+    일부 구간만 붙어 있어도 교정 대상으로 본다 (기본 규칙만으로는 고칠 수 없음).
+    """
+    runs = [len(run) for run in _HANGUL_RUN_RE.findall(text)]
+    if not runs:
+        return False  # 한글이 없으면 교정 대상 아님
+
+    if max(runs) > _MAX_RUN_LENGTH:
+        return True  # 띄어쓰기 없이 붙은 구간
+    total = sum(runs)
+    if total / len(runs) > _MAX_MEAN_RUN_LENGTH:
+        return True
+    if sum(run for run in runs if run >= _LONG_RUN_LENGTH) / total > _MAX_LONG_RUN_RATIO:
+        return True  # 조금씩 붙은 어절이 많음
+    return runs.count(1) / len(runs) > _MAX_SINGLE_RATIO
+
+
+@functools.lru_cache(maxsize=2048)
+def _basic_spacing(text: str) -> str:
+    """기본 띄어쓰기 규칙 적용 (인스턴스 간 캐시 공유)"""
+    # 마침표, 쉼표가 없으면 바꿀 것이 없음
+    if '.' not in text and ',' not in text:
+        return text
+    # 마침표, 쉼표 뒤 띄어쓰기
+    text = _PERIOD_RE.sub('. ', text)
+    text = _COMMA_RE.sub(', ', text)
+    return text
+
 
 class TextFormatter:
     """텍스트 띄어쓰기 및 형식 정리"""
@@ -14,12 +62,17 @@ class TextFormatter:
             raise ValueError("OPENAI_API_KEY 환경변수를 설정해주세요")
 
         self.client = OpenAI(api_key=self.api_key)
+        self.max_concurrency = 8  # 동시 요청 수
 
     def format_text(self, text: str) -> str:
         """텍스트 띄어쓰기 및 형식 정리"""
         if not text or len(text) < 10:
             return text
 
+        # 띄어쓰기가 이미 정상이면 API 호출 없이 기본 규칙만 적용
+        if not _needs_formatting(text):
+            return _basic_spacing(text)
+
         try:
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
@@ -69,28 +122,33 @@ JSON 형식으로 응답하세요: {"formatted": "교정된 텍스트"}"""
 
     def _basic_spacing(self, text: str) -> str:
         """기본 띄어쓰기 규칙 적용"""
-        # 마침표, 쉼표 뒤 띄어쓰기
-        import re
-        text = re.sub(r'\.(?=[가-힣A-Za-z])', '. ', text)
-        text = re.sub(r',(?=[가-힣A-Za-z])', ', ', text)
-        return text
+        return _basic_spacing(text)
 
     def format_batch(self, texts: list[str]) -> list[str]:
-        """여러 텍스트 개별 포맷팅 (정확도 향상)"""
+        """여러 텍스트 개별 포맷팅 (정확도 향상, 중복 제거 후 동시 요청)"""
         if not texts:
             return texts
 
-        formatted_texts = []
+        # 같은 텍스트는 한 번만 요청 (실패 메시지는 첫 등장 위치 기준)
+        first_pos = {}
         for i, text in enumerate(texts):
-            try:
-                formatted = self.format_text(text)
-                formatted_texts.append(formatted)
-                print(f"    텍스트 {i+1}/{len(texts)} 포맷팅 완료")
-            except Exception as e:
-                print(f"    텍스트 {i+1} 포맷팅 실패: {e}")
-                formatted_texts.append(text)
-
-        return formatted_texts
+            first_pos.setdefault(text, i)
+
+        results = {}
+        workers = min(self.max_concurrency, len(first_pos))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.format_text, text): text for text in first_pos}
+            # 진행 상황은 메인 스레드에서 완료된 개수로 출력
+            for done, future in enumerate(as_completed(futures), 1):
+                text = futures[future]
+                try:
+                    results[text] = future.result()
+                    print(f"    텍스트 {done}/{len(futures)} 포맷팅 완료")
+                except Exception as e:
+                    print(f"    텍스트 {first_pos[text]+1} 포맷팅 실패: {e}")
+                    results[text] = text
+
+        return [results[text] for text in texts]
 
 
 # 싱글톤 인스턴스
@@ -3,9 +3,13 @@
 import re
 from pathlib import Path
 from dataclasses import dataclass
+from typing import Iterator
 
 import fitz  # PyMuPDF
 
+# PDF에서 자주 섞여 나오는 보이지 않는 문자 (제로폭 공백/BOM 제거, NBSP는 일반 공백으로)
+_INVISIBLE_CHARS = str.maketrans({'\u200b': None, '\ufeff': None, '\xa0': ' '})
+
 
 @dataclass
 class PageContent:
@@ -18,6 +22,10 @@ class PageContent:
 class PDFReader:
     """PDF에서 텍스트를 추출하는 클래스"""
 
+    # 정규화 패턴 (페이지마다 쓰이므로 미리 컴파일)
+    SPACES_PATTERN = re.compile(r'[ \t]+')
+    BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+
     def __init__(self, pdf_path: str | Path):
         self.pdf_path = Path(pdf_path)
         if not self.pdf_path.exists():
@@ -55,39 +63,48 @@ class PDFReader:
             raw_text=raw_text
         )
 
+    def iter_pages(self, start: int = 1, end: int | None = None) -> Iterator[tuple[int, str]]:
+        """(페이지 번호, 정규화 텍스트)를 순서대로 반환 (1-indexed, inclusive)"""
+        last = self.page_count if end is None else min(end, self.page_count)
+        for i in range(max(start, 1) - 1, last):
+            yield i + 1, self._normalize_text(self.doc[i].get_text())
+
     def extract_all_pages(self) -> list[PageContent]:
         """모든 페이지 텍스트 추출"""
-        return [self.extract_page(i) for i in range(self.page_count)]
+        # 문서를 한 번 순회 (PyMuPDF 문서는 스레드 간 공유 불가이므로 순차 처리)
+        contents = []
+        for page in self.doc:
+            raw_text = page.get_text()
+            contents.append(PageContent(
+                page_num=page.number + 1,
+                text=self._normalize_text(raw_text),
+                raw_text=raw_text
+            ))
+        return contents
 
     def extract_with_markers(self) -> str:
         """페이지 마커가 포함된 전체 텍스트 반환"""
-        result = []
-        for i in range(self.page_count):
-            page_content = self.extract_page(i)
-            result.append(f"[p{page_content.page_num}]")
-            result.append(page_content.text)
-        return "\n".join(result)
+        return self.extract_page_range(1, self.page_count)
 
     def extract_page_range(self, start: int, end: int) -> str:
         """페이지 범위 텍스트 추출 (1-indexed, inclusive)"""
+        # raw_text/PageContent 없이 정규화 텍스트만 바로 이어 붙인다
         result = []
-        for i in range(start - 1, min(end, self.page_count)):
-            page_content = self.extract_page(i)
-            result.append(f"[p{page_content.page_num}]")
-            result.append(page_content.text)
+        for page_num, text in self.iter_pages(start, end):
+            result.append(f"[p{page_num}]")
+            result.append(text)
         return "\n".join(result)
 
     def _normalize_text(self, text: str) -> str:
         """텍스트 정규화"""
+        text = text.translate(_INVISIBLE_CHARS)
         # 연속된 공백을 하나로
-        text = re.sub(r'[ \t]+', ' ', text)
+        text = self.SPACES_PATTERN.sub(' ', text)
         # 연속된 줄바꿈을 최대 2개로
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        # 줄 앞뒤 공백 제거
-        lines = [line.strip() for line in text.split('\n')]
-        text = '\n'.join(lines)
-        # 앞뒤 공백 제거
-        return text.strip()
+        if '\n\n\n' in text:
+            text = self.BLANK_LINES_PATTERN.sub('\n\n', text)
+        # 줄 앞뒤 공백 제거 후 전체 앞뒤 공백 제거
+        return '\n'.join([line.strip() for line in text.split('\n')]).strip()
 
     def get_filename(self) -> str:
         """파일명 반환 (확장자 제외)"""
@@ -1,5 +1,6 @@
 """테이블 파싱 및 복원 모듈"""
 
+import functools
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -38,8 +39,14 @@ class TableParser:
     # 백분위 패턴
     PERCENTILE_PATTERN = re.compile(r'(\d{1,3})(?:\.\d+)?\s*%')
 
-    # 과목명 사전
-    SUBJECTS = {
+    # 등급 숫자만 있는 셀
+    SINGLE_GRADE_PATTERN = re.compile(r'^([1-9])$')
+
+    # 과목 레벨 접미사 (화학I, 화학II -> 화학)
+    LEVEL_SUFFIX_PATTERN = re.compile(r'[IⅠⅡ12]+$')
+
+    # 과목명 사전 (find_subject 결과를 캐시하므로 불변)
+    SUBJECTS = frozenset({
         '국어', '수학', '영어', '한국사', '사회', '과학', '물리', '화학', '생명과학', '지구과학',
         '물리학', '화학I', '화학II', '생명과학I', '생명과학II', '지구과학I', '지구과학II',
         '물리학I', '물리학II', '통합과학', '과학탐구실험',
@@ -48,7 +55,13 @@ class TableParser:
         '미적분', '확률과통계', '기하', '수학I', '수학II',
         '음악', '미술', '체육', '기술가정', '정보', '제2외국어', '한문',
         '일본어', '중국어', '독일어', '프랑스어', '스페인어', '아랍어', '베트남어', '러시아어'
-    }
+    })
+
+    # 부분 일치 검색 순서 (긴 과목명 우선, 해시 순서와 무관하게 고정)
+    SUBJECTS_BY_LENGTH = tuple(sorted(SUBJECTS, key=lambda s: (-len(s), s)))
+
+    # 텍스트 안의 과목명을 한 번의 스캔으로 찾는 패턴
+    SUBJECT_PATTERN = re.compile('|'.join(re.escape(s) for s in SUBJECTS_BY_LENGTH))
 
     # 과목 유사어 매핑 (정규화용)
     SUBJECT_ALIASES = {
@@ -107,10 +120,8 @@ class TableParser:
                     if cell is None:
                         cleaned_row.append('')
                     else:
-                        # 줄바꿈과 공백 정리
-                        text = str(cell).replace('\n', ' ').strip()
-                        text = re.sub(r'\s+', ' ', text)
-                        cleaned_row.append(text)
+                        # 줄바꿈 포함 연속 공백을 하나로, 앞뒤 공백 제거 (split/join 한 번)
+                        cleaned_row.append(' '.join(str(cell).split()))
                 # 빈 행이 아닌 경우만 추가
                 if any(cell for cell in cleaned_row):
                     cleaned.append(cleaned_row)
@@ -129,7 +140,7 @@ class TableParser:
         if match:
             return int(match.group(1))
         # 단순 숫자인 경우 (1-9 범위)
-        simple_match = re.match(r'^([1-9])$', text.strip())
+        simple_match = self.SINGLE_GRADE_PATTERN.match(text.strip())
         if simple_match:
             return int(simple_match.group(1))
         return None
@@ -148,36 +159,45 @@ class TableParser:
             return float(match.group(1))
         return None
 
-    def find_subject(self, text: str) -> str | None:
-        """과목명 찾기"""
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def find_subject(text: str) -> str | None:
+        """과목명 찾기 (같은 셀 텍스트는 캐시 사용)"""
         text = text.strip()
 
         # 정확히 일치
-        if text in self.SUBJECTS:
+        if text in TableParser.SUBJECTS:
             return text
 
         # 별칭 확인
-        if text in self.SUBJECT_ALIASES:
-            return self.SUBJECT_ALIASES[text]
+        if text in TableParser.SUBJECT_ALIASES:
+            return TableParser.SUBJECT_ALIASES[text]
 
-        # 부분 일치
-        for subject in self.SUBJECTS:
-            if subject in text or text in subject:
+        # 부분 일치 (텍스트가 과목명을 포함)
+        match = TableParser.SUBJECT_PATTERN.search(text)
+        if match:
+            return match.group(0)
+
+        # 부분 일치 (과목명이 텍스트를 포함)
+        for subject in TableParser.SUBJECTS_BY_LENGTH:
+            if text in subject:
                 return subject
 
         return None
 
-    def normalize_subject(self, subject: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def normalize_subject(subject: str) -> str:
         """과목명 정규화 (유사 과목 그룹화)"""
         # 기본 정규화
         subject = subject.strip()
 
         # 별칭 변환
-        if subject in self.SUBJECT_ALIASES:
-            subject = self.SUBJECT_ALIASES[subject]
+        if subject in TableParser.SUBJECT_ALIASES:
+            subject = TableParser.SUBJECT_ALIASES[subject]
 
         # 레벨 제거 (화학I, 화학II -> 화학)
-        base_subject = re.sub(r'[IⅠⅡ12]+$', '', subject).strip()
+        base_subject = TableParser.LEVEL_SUFFIX_PATTERN.sub('', subject).strip()
 
         return base_subject if base_subject else subject
 
@@ -199,12 +219,8 @@ class TableParser:
                 if current_row:
                     rows.append(current_row)
                 current_row = [line]
-            # 과목명이면 같은 행에 추가
-            elif self.find_subject(line):
-                current_row.append(line)
-            # 등급이나 점수면 같은 행에 추가
-            elif self.parse_grade(line) or self.parse_score(line):
-                current_row.append(line)
+            # 과목명, 등급, 점수 등 나머지는 모두 같은 행에 추가
+            # (종류별 판별은 결과가 같으므로 줄마다 정규식 한 번만 실행)
             else:
                 current_row.append(line)
 
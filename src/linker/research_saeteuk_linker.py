@@ -1,5 +1,6 @@
 """탐구-세특 연결 모듈"""
 
+import functools
 import re
 from dataclasses import dataclass
 
@@ -13,6 +14,19 @@ class SubjectGroup:
     members: set[str]
 
 
+def _build_subject_map(groups: list[SubjectGroup], level_suffix: re.Pattern) -> dict[str, str]:
+    """과목명 → 그룹명 매핑 구축 (레벨 표시 제거 버전 포함)"""
+    subject_to_group = {}
+    for group in groups:
+        for member in group.members:
+            subject_to_group[member.lower()] = group.name
+            # 레벨 표시 제거 버전도 추가
+            base = level_suffix.sub('', member).strip().lower()
+            if base:
+                subject_to_group[base] = group.name
+    return subject_to_group
+
+
 class ResearchSaeteukLinker:
     """탐구 활동과 세특을 연결하는 클래스"""
 
@@ -32,19 +46,38 @@ class ResearchSaeteukLinker:
         SubjectGroup('과학탐구', {'과학', '통합과학', '과학탐구실험'}),
     ]
 
-    def __init__(self):
-        self.subject_to_group: dict[str, str] = {}
-        self._build_subject_map()
+    # 학기 표기 ("1-1", "1학년1학기" 등)
+    TERM_PATTERN = re.compile(r'([1-3])[-학년]?\s*([1-2])')
+
+    # 과목 레벨 접미사 (화학I, 화학II -> 화학)
+    LEVEL_SUFFIX_PATTERN = re.compile(r'[IⅠⅡ12]+$')
+
+    # 내용 유사도용 한글 단어 (2글자 이상)
+    KEYWORD_PATTERN = re.compile(r'[가-힣]{2,}')
 
-    def _build_subject_map(self):
-        """과목명 → 그룹명 매핑 구축"""
-        for group in self.SUBJECT_GROUPS:
-            for member in group.members:
-                self.subject_to_group[member.lower()] = group.name
-                # 레벨 표시 제거 버전도 추가
-                base = re.sub(r'[IⅠⅡ12]+$', '', member).strip().lower()
-                if base:
-                    self.subject_to_group[base] = group.name
+    # 과목명 → 그룹명 (클래스 로드 시 한 번만 구축, 같은 클래스의 인스턴스가 공유)
+    SUBJECT_TO_GROUP = _build_subject_map(SUBJECT_GROUPS, LEVEL_SUFFIX_PATTERN)
+
+    # 일치 종류별 (점수, 근거)
+    TERM_MATCH_SCORES = {
+        'exact': (0.3, '같은 학기'),
+        'adjacent': (0.1, '인접 학기'),
+    }
+    SUBJECT_MATCH_SCORES = {
+        'exact': (0.4, '같은 과목'),
+        'similar': (0.25, '유사 과목'),
+    }
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 하위 클래스가 SUBJECT_GROUPS를 바꾸면 매핑도 그 클래스 기준으로 다시 구축
+        if 'SUBJECT_TO_GROUP' not in cls.__dict__:
+            cls.SUBJECT_TO_GROUP = _build_subject_map(cls.SUBJECT_GROUPS, cls.LEVEL_SUFFIX_PATTERN)
+
+    @property
+    def subject_to_group(self) -> dict[str, str]:
+        """과목명 → 그룹명 매핑 (SUBJECT_TO_GROUP 별칭)"""
+        return type(self).SUBJECT_TO_GROUP
 
     def link(
         self,
@@ -62,23 +95,34 @@ class ResearchSaeteukLinker:
         used_researches = set()
         used_saeteuks = set()
 
-        # 모든 조합에 대해 매칭 점수 계산
+        # 항목별 키워드를 한 번만 추출해 비트마스크로 변환 (쌍마다 정규식/집합 연산 생략)
+        vocab: dict[str, int] = {}
+        research_masks = [
+            self._keyword_mask(self._research_keywords(r), vocab) for r in researches
+        ]
+        saeteuk_masks = [
+            self._keyword_mask(self._saeteuk_keywords(s), vocab) for s in saeteuks
+        ]
+
+        # 모든 조합에 대해 매칭 점수 계산 (근거 문자열은 연결된 쌍만 생성)
         candidates = []
-        for research in researches:
+        for research, research_mask in zip(researches, research_masks):
             if not research.id:
                 continue
-            for saeteuk in saeteuks:
+            for saeteuk, saeteuk_mask in zip(saeteuks, saeteuk_masks):
                 if not saeteuk.id:
                     continue
-                score, reason = self._calculate_match_score(research, saeteuk)
+                content_score = self._mask_similarity(research_mask, saeteuk_mask)
+                parts = self._match_parts(research, saeteuk, content_score)
+                score = self._score_from_parts(*parts)
                 if score > 0:
-                    candidates.append((score, reason, research.id, saeteuk.id))
+                    candidates.append((score, parts, research.id, saeteuk.id))
 
         # 점수 높은 순으로 정렬
         candidates.sort(key=lambda x: -x[0])
 
         # 탐욕적 매칭 (각 항목은 한 번만 연결)
-        for score, reason, research_id, saeteuk_id in candidates:
+        for score, parts, research_id, saeteuk_id in candidates:
             if research_id in used_researches or saeteuk_id in used_saeteuks:
                 continue
 
@@ -86,7 +130,7 @@ class ResearchSaeteukLinker:
                 research_id=research_id,
                 saeteuk_id=saeteuk_id,
                 match_score=score,
-                match_reason=reason
+                match_reason=self._reason_from_parts(*parts)
             ))
             used_researches.add(research_id)
             used_saeteuks.add(saeteuk_id)
@@ -110,47 +154,67 @@ class ResearchSaeteukLinker:
         Returns:
             (score, reason) - 점수와 매칭 근거
         """
+        parts = self._match_parts(research, saeteuk)
+        return self._score_from_parts(*parts), self._reason_from_parts(*parts)
+
+    def _match_parts(
+        self,
+        research: ResearchItem,
+        saeteuk: SaeteukExample,
+        content_score: float | None = None
+    ) -> tuple[str, str, float]:
+        """매칭 요소 (학기 일치, 과목 일치, 내용 유사도)
+
+        content_score를 넘기면 내용 유사도를 다시 계산하지 않는다.
+        """
+        if content_score is None:
+            content_score = self._check_content_similarity(research, saeteuk)
+        return (
+            self._check_term_match(research.term, saeteuk.term),
+            self._check_subject_match(research.subject, saeteuk.subject),
+            content_score,
+        )
+
+    def _score_from_parts(self, term_match: str, subject_match: str, content_score: float) -> float:
+        """매칭 요소 -> 점수 (0-1)"""
         score = 0.0
-        reasons = []
 
-        # 1. 학기 일치 (+0.3)
-        term_match = self._check_term_match(research.term, saeteuk.term)
-        if term_match == 'exact':
-            score += 0.3
-            reasons.append('같은 학기')
-        elif term_match == 'adjacent':
-            score += 0.1
-            reasons.append('인접 학기')
+        # 1. 학기 일치 (+0.3 또는 +0.1)
+        if term_match in self.TERM_MATCH_SCORES:
+            score += self.TERM_MATCH_SCORES[term_match][0]
 
         # 2. 과목 일치 (+0.4 또는 +0.25)
-        subject_match = self._check_subject_match(research.subject, saeteuk.subject)
-        if subject_match == 'exact':
-            score += 0.4
-            reasons.append('같은 과목')
-        elif subject_match == 'similar':
-            score += 0.25
-            reasons.append('유사 과목')
+        if subject_match in self.SUBJECT_MATCH_SCORES:
+            score += self.SUBJECT_MATCH_SCORES[subject_match][0]
 
         # 3. 키워드/내용 유사도 (+0.3)
-        content_score = self._check_content_similarity(research, saeteuk)
         if content_score > 0:
             score += content_score
-            reasons.append(f'내용 유사 ({int(content_score * 100)}%)')
 
         # 최종 점수 정규화 (0-1)
-        score = min(score, 1.0)
+        return min(score, 1.0)
 
-        reason = ', '.join(reasons) if reasons else '연결 불가'
-        return score, reason
+    def _reason_from_parts(self, term_match: str, subject_match: str, content_score: float) -> str:
+        """매칭 요소 -> 매칭 근거"""
+        reasons = []
+        if term_match in self.TERM_MATCH_SCORES:
+            reasons.append(self.TERM_MATCH_SCORES[term_match][1])
+        if subject_match in self.SUBJECT_MATCH_SCORES:
+            reasons.append(self.SUBJECT_MATCH_SCORES[subject_match][1])
+        if content_score > 0:
+            reasons.append(f'내용 유사 ({int(content_score * 100)}%)')
+        return ', '.join(reasons) if reasons else '연결 불가'
 
-    def _check_term_match(self, term1: str | None, term2: str | None) -> str:
-        """학기 일치 확인"""
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _check_term_match(term1: str | None, term2: str | None) -> str:
+        """학기 일치 확인 (같은 학기 쌍은 캐시 사용)"""
         if not term1 or not term2:
             return 'none'
 
         # 정규화: "1-1", "1학년1학기" 등을 (학년, 학기) 튜플로
         def normalize_term(t: str) -> tuple[int, int] | None:
-            match = re.search(r'([1-3])[-학년]?\s*([1-2])', t)
+            match = ResearchSaeteukLinker.TERM_PATTERN.search(t)
             if match:
                 return int(match.group(1)), int(match.group(2))
             return None
@@ -176,8 +240,10 @@ class ResearchSaeteukLinker:
 
         return 'none'
 
-    def _check_subject_match(self, subj1: str | None, subj2: str | None) -> str:
-        """과목 일치 확인"""
+    @classmethod
+    @functools.lru_cache(maxsize=1024)
+    def _check_subject_match(cls, subj1: str | None, subj2: str | None) -> str:
+        """과목 일치 확인 (클래스별로 같은 과목 쌍은 캐시 사용)"""
         if not subj1 or not subj2:
             return 'none'
 
@@ -190,18 +256,18 @@ class ResearchSaeteukLinker:
             return 'exact'
 
         # 그룹으로 일치 확인
-        group1 = self.subject_to_group.get(s1)
-        group2 = self.subject_to_group.get(s2)
+        group1 = cls.SUBJECT_TO_GROUP.get(s1)
+        group2 = cls.SUBJECT_TO_GROUP.get(s2)
 
         # 레벨 제거 후 재시도
-        s1_base = re.sub(r'[IⅠⅡ12]+$', '', s1).strip()
-        s2_base = re.sub(r'[IⅠⅡ12]+$', '', s2).strip()
+        s1_base = cls.LEVEL_SUFFIX_PATTERN.sub('', s1).strip()
+        s2_base = cls.LEVEL_SUFFIX_PATTERN.sub('', s2).strip()
 
         if s1_base == s2_base:
             return 'exact'
 
-        group1 = group1 or self.subject_to_group.get(s1_base)
-        group2 = group2 or self.subject_to_group.get(s2_base)
+        group1 = group1 or cls.SUBJECT_TO_GROUP.get(s1_base)
+        group2 = group2 or cls.SUBJECT_TO_GROUP.get(s2_base)
 
         if group1 and group2 and group1 == group2:
             return 'similar'
@@ -214,34 +280,61 @@ class ResearchSaeteukLinker:
         saeteuk: SaeteukExample
     ) -> float:
         """내용 유사도 확인 (키워드 기반)"""
-        # 탐구 키워드 수집
-        research_keywords = set()
+        research_keywords = self._research_keywords(research)
+        saeteuk_keywords = self._saeteuk_keywords(saeteuk)
+
+        if not research_keywords or not saeteuk_keywords:
+            return 0.0
+
+        # Jaccard 유사도
+        intersection = research_keywords & saeteuk_keywords
+        union = research_keywords | saeteuk_keywords
+        return self._similarity_score(len(intersection), len(union))
+
+    def _research_keywords(self, research: ResearchItem) -> set[str]:
+        """탐구 키워드 수집"""
+        keywords = set()
         if research.keywords:
-            research_keywords.update(kw.lower() for kw in research.keywords)
+            keywords.update(kw.lower() for kw in research.keywords)
         if research.title:
             # 제목에서 주요 단어 추출
-            words = re.findall(r'[가-힣]{2,}', research.title)
-            research_keywords.update(w.lower() for w in words if len(w) >= 2)
+            words = self.KEYWORD_PATTERN.findall(research.title)
+            keywords.update(w.lower() for w in words if len(w) >= 2)
+        return keywords
 
-        # 세특 키워드 수집
-        saeteuk_keywords = set()
+    def _saeteuk_keywords(self, saeteuk: SaeteukExample) -> set[str]:
+        """세특 키워드 수집"""
+        keywords = set()
         if saeteuk.highlights:
-            saeteuk_keywords.update(hl.lower() for hl in saeteuk.highlights)
+            keywords.update(hl.lower() for hl in saeteuk.highlights)
         if saeteuk.content:
             # 내용에서 주요 단어 추출
-            words = re.findall(r'[가-힣]{2,}', saeteuk.content)
-            saeteuk_keywords.update(w.lower() for w in words if len(w) >= 2)
-
-        if not research_keywords or not saeteuk_keywords:
+            words = self.KEYWORD_PATTERN.findall(saeteuk.content)
+            keywords.update(w.lower() for w in words if len(w) >= 2)
+        return keywords
+
+    @staticmethod
+    def _keyword_mask(keywords: set[str], vocab: dict[str, int]) -> int:
+        """키워드 집합 -> 비트마스크 (vocab: 키워드 -> 비트 위치, 새 키워드는 추가)"""
+        mask = 0
+        for kw in keywords:
+            mask |= 1 << vocab.setdefault(kw, len(vocab))
+        return mask
+
+    def _mask_similarity(self, research_mask: int, saeteuk_mask: int) -> float:
+        """비트마스크 Jaccard 유사도 (_check_content_similarity와 같은 값)"""
+        if not research_mask or not saeteuk_mask:
             return 0.0
+        intersection = (research_mask & saeteuk_mask).bit_count()
+        union = (research_mask | saeteuk_mask).bit_count()
+        return self._similarity_score(intersection, union)
 
-        # Jaccard 유사도
-        intersection = research_keywords & saeteuk_keywords
-        union = research_keywords | saeteuk_keywords
-
+    @staticmethod
+    def _similarity_score(intersection: int, union: int) -> float:
+        """공통/전체 키워드 수 -> 내용 유사도 점수"""
         if not union:
             return 0.0
 
         # 최대 0.3점
-        similarity = len(intersection) / len(union)
+        similarity = intersection / union
         return min(similarity * 0.5, 0.3)
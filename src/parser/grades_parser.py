@@ -18,13 +18,28 @@ class GradesParser:
     """성적 섹션 파서"""
 
     # 내신 과목 목록
-    NESIN_SUBJECTS = ['국어', '영어', '수학', '사회', '과학', '기타', '주요과목', '전과목']
+    NESIN_SUBJECTS = frozenset({'국어', '영어', '수학', '사회', '과학', '기타', '주요과목', '전과목'})
 
     # 학기 헤더 패턴
-    TERM_HEADERS = ['1-1', '1-2', '2-1', '2-2', '3-1', '3-2']
+    TERM_HEADERS = frozenset({'1-1', '1-2', '2-1', '2-2', '3-1', '3-2'})
 
     # 모의고사/수능 과목 헤더
-    EXAM_HEADERS = ['한국사', '국어', '수학', '영어', '탐구1', '탐구2']
+    EXAM_HEADERS = frozenset({'한국사', '국어', '수학', '영어', '탐구1', '탐구2'})
+
+    # 성적 섹션 제목 (전체 텍스트를 한 번만 스캔해 모든 섹션 위치를 찾는다)
+    SECTION_HEADER_PATTERN = re.compile(r'내신 ?성적|[69]월 ?모의고사|수능 ?성적')
+
+    # 내신 값 (등급/평균: 숫자, 소수점, -)
+    NESIN_VALUE_PATTERN = re.compile(r'^[\d.-]+$')
+
+    # 모의고사/수능 표의 구분 행 -> 구분 번호 (선택과목, 백분위, 등급 순)
+    EXAM_PHASES = {'선택과목': 0, '백분위': 1, '등급': 2}
+
+    # 모의고사/수능 선택과목, 백분위, 등급 값
+    SELECT_SUBJECT_PATTERN = re.compile(r'^[가-힣]+')
+    SUNEUNG_SELECT_SUBJECT_PATTERN = re.compile(r'^[가-힣∙]+')
+    PERCENTILE_PATTERN = re.compile(r'^\d+$')
+    GRADE_PATTERN = re.compile(r'^[1-9]$')
 
     def __init__(self, table_parser: TableParser | None = None):
         self.table_parser = table_parser
@@ -33,34 +48,56 @@ class GradesParser:
         """성적 섹션 파싱"""
         section = GradesSection()
 
+        # 섹션 위치는 한 번에 찾고, 각 파서는 제목 라인부터 필요한 라인만 잘라 쓴다
+        # (문서 전체를 라인 리스트로 만들지 않음)
+        headers = self._find_section_headers(text)
+
         # 내신 성적 파싱 (라인 기반)
-        section.nesin = self._parse_nesin_from_lines(text)
+        section.nesin = self._parse_nesin_from_lines(text, headers)
 
         # 모의고사 성적 파싱
-        section.mock_exams = self._parse_mock_exams_from_lines(text)
+        section.mock_exams = self._parse_mock_exams_from_lines(text, headers)
 
         # 수능 성적 파싱
-        section.suneung = self._parse_suneung_from_lines(text)
+        section.suneung = self._parse_suneung_from_lines(text, headers)
 
         # 성적 유형 추론
         section.grade_type = self._infer_grade_type(section)
 
         return section
 
-    def _parse_nesin_from_lines(self, text: str) -> NesinGrades:
+    def _find_section_headers(self, text: str) -> dict[str, list[int]]:
+        """섹션 제목(공백 제거) -> 제목이 있는 라인의 시작 위치 목록 (오름차순, 중복 없음)"""
+        headers: dict[str, list[int]] = {}
+        for match in self.SECTION_HEADER_PATTERN.finditer(text):
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            found = headers.setdefault(match.group().replace(' ', ''), [])
+            if not found or found[-1] != line_start:
+                found.append(line_start)
+        return headers
+
+    def _lines_from(self, text: str, start: int, count: int) -> list[str]:
+        """start 위치의 라인부터 최대 count개 라인 (text.split('\n')과 같은 분리)"""
+        lines = []
+        while len(lines) < count:
+            end = text.find('\n', start)
+            if end < 0:
+                lines.append(text[start:])
+                break
+            lines.append(text[start:end])
+            start = end + 1
+        return lines
+
+    def _parse_nesin_from_lines(self, text: str, headers: dict[str, list[int]]) -> NesinGrades:
         """라인 기반 내신 성적 파싱"""
         nesin = NesinGrades()
-        lines = text.split('\n')
 
-        # "내신성적" 또는 "2. 내신성적" 찾기
-        start_idx = None
-        for i, line in enumerate(lines):
-            if '내신성적' in line or '내신 성적' in line:
-                start_idx = i
-                break
-
-        if start_idx is None:
+        # "내신성적" 또는 "2. 내신성적"이 처음 나오는 라인부터
+        # 학기 헤더(최대 20줄) + 과목 값(최대 100줄)까지만 사용
+        if '내신성적' not in headers:
             return nesin
+        lines = self._lines_from(text, headers['내신성적'][0], 120)
+        start_idx = 0
 
         # 구분 헤더 찾기 (1-1, 1-2, 2-1, 2-2, 3-1)
         terms = []
@@ -111,7 +148,7 @@ class GradesParser:
             # 숫자 값 확인 (등급 또는 평균)
             if current_subject:
                 # 숫자, 소수점, 또는 - 인 경우
-                if re.match(r'^[\d.-]+$', line) or line == '-':
+                if self.NESIN_VALUE_PATTERN.match(line) or line == '-':
                     subject_values.append(line)
 
         # 마지막 과목 처리
@@ -148,22 +185,23 @@ class GradesParser:
                 except ValueError:
                     pass
 
-    def _parse_mock_exams_from_lines(self, text: str) -> list[MockExamRow]:
+    def _parse_mock_exams_from_lines(self, text: str, headers: dict[str, list[int]]) -> list[MockExamRow]:
         """모의고사 성적 라인 기반 파싱"""
         rows = []
-        lines = text.split('\n')
 
-        # 모의고사 섹션 찾기
-        exam_sections = []
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if '6월모의고사' in line or '6월 모의고사' in line:
-                exam_sections.append(('6월', i))
-            elif '9월모의고사' in line or '9월 모의고사' in line:
-                exam_sections.append(('9월', i))
+        # 모의고사 섹션 (라인 순서, 한 라인에 둘 다 있으면 6월 우선)
+        june = headers.get('6월모의고사', [])
+        june_lines = set(june)
+        exam_sections = [('6월', i) for i in june]
+        exam_sections.extend(
+            ('9월', i) for i in headers.get('9월모의고사', []) if i not in june_lines
+        )
+        exam_sections.sort(key=lambda x: x[1])
 
-        for exam_name, start_idx in exam_sections:
-            rows.extend(self._parse_single_mock_exam(lines, start_idx, exam_name))
+        # 각 시험은 제목 라인부터 30줄만 사용
+        for exam_name, line_start in exam_sections:
+            lines = self._lines_from(text, line_start, 30)
+            rows.extend(self._parse_single_mock_exam(lines, 0, exam_name))
 
         return rows
 
@@ -171,54 +209,11 @@ class GradesParser:
         """단일 모의고사 파싱"""
         rows = []
 
-        # 과목 헤더 위치 찾기
-        subjects = []
-        select_subjects = []
-        percentiles = []
-        grades = []
-
-        phase = 'header'  # header -> select -> percentile -> grade
-
-        for i in range(start_idx + 1, min(start_idx + 30, len(lines))):
-            line = lines[i].strip()
-
-            if not line:
-                continue
-
-            # 다음 섹션 시작 감지
-            if any(kw in line for kw in ['9월모의고사', '수능성적', '수시카드', '[p']):
-                break
-
-            # 과목 헤더
-            if line in self.EXAM_HEADERS:
-                subjects.append(line)
-                continue
-
-            # 선택과목 행
-            if line == '선택과목':
-                phase = 'select'
-                continue
-
-            # 백분위 행
-            if line == '백분위':
-                phase = 'percentile'
-                continue
-
-            # 등급 행
-            if line == '등급':
-                phase = 'grade'
-                continue
-
-            # 값 수집
-            if phase == 'select':
-                if line == '-' or re.match(r'^[가-힣]+', line):
-                    select_subjects.append(line)
-            elif phase == 'percentile':
-                if line == '-' or re.match(r'^\d+$', line):
-                    percentiles.append(line)
-            elif phase == 'grade':
-                if re.match(r'^[1-9]$', line):
-                    grades.append(line)
+        # 과목 헤더와 구분별 값 수집
+        subjects, select_subjects, percentiles, grades = self._collect_exam_values(
+            lines, start_idx, ['9월모의고사', '수능성적', '수시카드', '[p'],
+            self.SELECT_SUBJECT_PATTERN,
+        )
 
         # 행 생성
         for i, subj in enumerate(subjects):
@@ -245,29 +240,26 @@ class GradesParser:
 
         return rows
 
-    def _parse_suneung_from_lines(self, text: str) -> SuneungScores | None:
-        """수능 성적 라인 기반 파싱"""
-        lines = text.split('\n')
-
-        # 수능성적 섹션 찾기
-        start_idx = None
-        for i, line in enumerate(lines):
-            if '수능성적' in line or '수능 성적' in line:
-                start_idx = i
-                break
-
-        if start_idx is None:
-            return None
-
-        suneung = SuneungScores()
-
-        # 과목별 데이터 수집
+    def _collect_exam_values(
+        self,
+        lines: list[str],
+        start_idx: int,
+        stop_keywords: list[str],
+        select_pattern: re.Pattern,
+    ) -> tuple[list[str], list[str], list[str], list[str]]:
+        """모의고사/수능 표 값 수집 -> (과목, 선택과목, 백분위, 등급)"""
         subjects = []
         select_subjects = []
         percentiles = []
         grades = []
 
-        phase = 'header'
+        # 구분 행 이후 값이 들어갈 목록과 허용 형식 (구분 번호는 EXAM_PHASES 값)
+        collectors = [
+            (select_subjects, select_pattern, True),
+            (percentiles, self.PERCENTILE_PATTERN, True),
+            (grades, self.GRADE_PATTERN, False),
+        ]
+        phase = None  # 과목 헤더 구간
 
         for i in range(start_idx + 1, min(start_idx + 30, len(lines))):
             line = lines[i].strip()
@@ -275,8 +267,8 @@ class GradesParser:
             if not line:
                 continue
 
-            # 다음 섹션 시작
-            if any(kw in line for kw in ['수시카드', '학교특성', '[p']):
+            # 다음 섹션 시작 감지
+            if any(kw in line for kw in stop_keywords):
                 break
 
             # 과목 헤더
@@ -284,25 +276,34 @@ class GradesParser:
                 subjects.append(line)
                 continue
 
-            if line == '선택과목':
-                phase = 'select'
-                continue
-            if line == '백분위':
-                phase = 'percentile'
-                continue
-            if line == '등급':
-                phase = 'grade'
+            # 선택과목/백분위/등급 구분 행
+            if line in self.EXAM_PHASES:
+                phase = self.EXAM_PHASES[line]
                 continue
 
-            if phase == 'select':
-                if line == '-' or re.match(r'^[가-힣∙]+', line):
-                    select_subjects.append(line)
-            elif phase == 'percentile':
-                if line == '-' or re.match(r'^\d+$', line):
-                    percentiles.append(line)
-            elif phase == 'grade':
-                if re.match(r'^[1-9]$', line):
-                    grades.append(line)
+            # 값 수집
+            if phase is not None:
+                values, pattern, allow_dash = collectors[phase]
+                if (allow_dash and line == '-') or pattern.match(line):
+                    values.append(line)
+
+        return subjects, select_subjects, percentiles, grades
+
+    def _parse_suneung_from_lines(self, text: str, headers: dict[str, list[int]]) -> SuneungScores | None:
+        """수능 성적 라인 기반 파싱"""
+        # 수능성적 섹션이 처음 나오는 라인부터 30줄만 사용
+        if '수능성적' not in headers:
+            return None
+        lines = self._lines_from(text, headers['수능성적'][0], 30)
+        start_idx = 0
+
+        suneung = SuneungScores()
+
+        # 과목별 데이터 수집
+        subjects, select_subjects, percentiles, grades = self._collect_exam_values(
+            lines, start_idx, ['수시카드', '학교특성', '[p'],
+            self.SUNEUNG_SELECT_SUBJECT_PATTERN,
+        )
 
         # 매핑
         subject_map = {subj: i for i, subj in enumerate(subjects)}
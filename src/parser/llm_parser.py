@@ -1,7 +1,9 @@
 """LLM 기반 파서 모듈 (GPT-4o-mini)"""
 
+import hashlib
 import json
 import os
+from pathlib import Path
 from typing import Any
 
 from openai import OpenAI
@@ -23,17 +25,23 @@ from ..models.schema import (
     Evidence,
 )
 
+# 응답 캐시 형식 버전 (호출 옵션이나 응답 JSON 형식이 바뀌면 올린다)
+LLM_CACHE_VERSION = 1
+
 
 class LLMParser:
     """GPT-4o-mini 기반 파서"""
 
-    def __init__(self, api_key: str | None = None):
+    def __init__(self, api_key: str | None = None, cache_dir: str | Path | None = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY가 필요합니다")
         self.client = OpenAI(api_key=self.api_key)
         self.model = "gpt-4o-mini"
+        self.temperature = 0.1
         self.total_tokens = 0
+        # 프롬프트 단위 응답 캐시 (None이면 사용 안 함)
+        self.cache_dir = Path(cache_dir) / "llm" if cache_dir else None
 
     def parse_all(self, text: str, alias: str, source_file: str) -> StudentData:
         """전체 텍스트 파싱"""
@@ -69,7 +77,18 @@ class LLMParser:
         )
 
     def _call_llm(self, system_prompt: str, user_prompt: str, max_tokens: int = 4096) -> dict:
-        """LLM API 호출"""
+        """LLM API 호출 (cache_dir이 있으면 동일 프롬프트 응답 재사용)"""
+        cache_path = None
+        if self.cache_dir:
+            # 프롬프트 템플릿은 system/user 프롬프트 본문에 그대로 들어 있으므로 바뀌면 키도 바뀐다
+            key = hashlib.sha256(
+                f"{LLM_CACHE_VERSION}|{self.model}|{self.temperature}|{max_tokens}|"
+                f"{system_prompt}|{user_prompt}".encode("utf-8")
+            ).hexdigest()
+            cache_path = self.cache_dir / f"{key}.json"
+            if cache_path.exists():
+                return json.loads(cache_path.read_text(encoding="utf-8"))
+
         response = self.client.chat.completions.create(
             model=self.model,
             messages=[
@@ -77,14 +96,22 @@ class LLMParser:
                 {"role": "user", "content": user_prompt},
             ],
             response_format={"type": "json_object"},
-            temperature=0.1,
+            temperature=self.temperature,
             max_tokens=max_tokens,
         )
 
         self.total_tokens += response.usage.total_tokens
 
         content = response.choices[0].message.content
-        return json.loads(content)
+        result = json.loads(content)
+
+        if cache_path:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            tmp_path.write_text(content, encoding="utf-8")
+            os.replace(tmp_path, cache_path)
+
+        return result
 
     def _parse_grades(self, text: str) -> GradesSection:
         """성적 파싱"""
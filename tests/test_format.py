@@ -0,0 +1,191 @@
+"""텍스트 포맷 API 배치 처리 테스트"""
+
+import asyncio
+
+import api.format as fmt
+
+
+class FakeOpenAI:
+    """call_openai 대체 (묶음 요청이면 packed, 아니면 single 응답)"""
+
+    def __init__(self, packed=None, single=None, error=None):
+        self.packed = packed
+        self.single = single or (lambda prompt: f"out:{prompt}")
+        self.error = error
+        self.calls = []
+
+    async def __call__(self, prompt, temperature=0, max_tokens=500, system=None):
+        self.calls.append((prompt, max_tokens, system))
+        if self.error:
+            raise self.error
+        if system and fmt._SYSTEM_PACKED in system:
+            return self.packed
+        return self.single(prompt)
+
+
+def run_batch(mode, texts):
+    """_run_batch 실행 후 각 future 결과(또는 예외) 반환"""
+    async def runner():
+        loop = asyncio.get_running_loop()
+        batch = [(mode, text, loop.create_future()) for text in texts]
+        await fmt._run_batch(batch)
+        return [f.exception() or f.result() for _, _, f in batch]
+    return asyncio.run(runner())
+
+
+class TestParsePacked:
+    """묶음 응답 파싱 테스트"""
+
+    def test_out_of_order(self):
+        result = "[1] 둘째\n[0] 첫째\n[2] 셋째"
+        assert fmt._parse_packed(result, 3) == {0: "첫째", 1: "둘째", 2: "셋째"}
+
+    def test_missing_index(self):
+        result = "[0] 첫째\n[2] 셋째"
+        assert fmt._parse_packed(result, 3) == {0: "첫째", 2: "셋째"}
+
+    def test_index_out_of_range(self):
+        result = "[0] 첫째\n[1] 둘째\n[5] 범위 밖"
+        assert fmt._parse_packed(result, 2) == {}
+
+    def test_duplicate_index(self):
+        result = "[0] 첫째\n[1] 둘째\n[1] 다른 둘째"
+        assert fmt._parse_packed(result, 2) == {}
+
+    def test_multiline_body(self):
+        result = "[0] 첫 줄\n둘째 줄\n\n셋째 줄\n[1] 다음 항목"
+        parsed = fmt._parse_packed(result, 2)
+        assert parsed[0] == "첫 줄\n둘째 줄\n\n셋째 줄"
+        assert parsed[1] == "다음 항목"
+
+    def test_inline_bracket_not_split(self):
+        result = "[0] 참고 [1] 은 줄 중간\n[1] 둘째"
+        assert fmt._parse_packed(result, 2) == {0: "참고 [1] 은 줄 중간", 1: "둘째"}
+
+
+class TestRunBatch:
+    """배치 실행 테스트"""
+
+    def test_packed_success(self, monkeypatch):
+        fake = FakeOpenAI(packed="[0] A\n[1] B")
+        monkeypatch.setattr(fmt, "call_openai", fake)
+
+        assert run_batch("format", ["a", "b"]) == ["A", "B"]
+        assert len(fake.calls) == 1
+
+    def test_missing_item_fallback(self, monkeypatch):
+        fake = FakeOpenAI(packed="[0] A\n[2] C")
+        monkeypatch.setattr(fmt, "call_openai", fake)
+
+        assert run_batch("format", ["a", "b", "c"]) == ["A", "out:b", "C"]
+        assert [c[0] for c in fake.calls[1:]] == ["b"]
+
+    def test_duplicate_index_falls_back_for_all(self, monkeypatch):
+        fake = FakeOpenAI(packed="[0] A\n[1] B\n[1] X")
+        monkeypatch.setattr(fmt, "call_openai", fake)
+
+        assert run_batch("format", ["a", "b"]) == ["out:a", "out:b"]
+        assert sorted(c[0] for c in fake.calls[1:]) == ["a", "b"]
+
+    def test_failed_packed_falls_back_to_original(self, monkeypatch):
+        fake = FakeOpenAI(packed=None, single=lambda prompt: None)
+        monkeypatch.setattr(fmt, "call_openai", fake)
+
+        assert run_batch("summarize", ["a", "b"]) == ["a", "b"]
+        assert len(fake.calls) == 3
+
+    def test_exception_propagates_to_all_futures(self, monkeypatch):
+        error = RuntimeError("boom")
+        monkeypatch.setattr(fmt, "call_openai", FakeOpenAI(error=error))
+
+        assert run_batch("format", ["a", "b", "c"]) == [error, error, error]
+
+    def test_packed_output_not_cached_as_single(self, monkeypatch):
+        monkeypatch.setattr(fmt, "call_openai", FakeOpenAI(packed="[0] A\n[1] B"))
+
+        run_batch("format", ["캐시 확인 a", "캐시 확인 b"])
+        for text in ["캐시 확인 a", "캐시 확인 b"]:
+            key = fmt._cache_key(*fmt._single_request("format", text))
+            assert fmt._cache_get(key) is None
+
+    def test_split_by_output_budget(self, monkeypatch):
+        fake = FakeOpenAI(packed="[0] A\n[1] B")
+        monkeypatch.setattr(fmt, "call_openai", fake)
+        texts = ["x" * 7000, "y" * 7000, "z" * 7000, "w" * 7000]
+
+        groups = fmt._split_by_budget("format", texts)
+        assert [len(g) for g in groups] == [2, 2]
+
+        assert run_batch("format", texts) == ["A", "B", "A", "B"]
+        assert all(c[1] <= fmt.MAX_OUTPUT_TOKENS for c in fake.calls)
+
+    def test_oversized_single_capped(self):
+        _, _, max_tokens, _ = fmt._single_request("format", "x" * 20000)
+        assert max_tokens == fmt.MAX_OUTPUT_TOKENS
+
+    def test_marker_lines_in_text_not_packed(self, monkeypatch):
+        # 본문의 "[1] ..." 줄이 다른 항목 경계로 잘못 잘리면 안 된다
+        marked = "목차입니다 다음과같습니다\n[1] 서론을씁니다\n[2] 본론을씁니다"
+        fake = FakeOpenAI(packed="[0] B\n[1] C")
+        monkeypatch.setattr(fmt, "call_openai", fake)
+
+        assert run_batch("format", [marked, "b", "c"]) == [f"out:{marked}", "B", "C"]
+        packed = [c for c in fake.calls if fmt._SYSTEM_PACKED in (c[2] or "")]
+        assert len(packed) == 1
+        assert marked not in packed[0][0]
+
+
+class TestBatcher:
+    """배치 큐/루프 수명 테스트"""
+
+    def test_lone_item_dispatched_without_wait(self, monkeypatch):
+        fake = FakeOpenAI()
+        monkeypatch.setattr(fmt, "call_openai", fake)
+        monkeypatch.setattr(fmt, "BATCH_WAIT_TIMEOUT_S", 30)
+
+        async def runner():
+            return await asyncio.wait_for(fmt._submit("summarize", "혼자 온 요청"), 1)
+
+        assert asyncio.run(runner()) == "out:혼자 온 요청"
+
+    def test_loop_state_closed_with_loop(self, monkeypatch):
+        monkeypatch.setattr(fmt, "call_openai", FakeOpenAI())
+
+        async def runner():
+            await fmt._submit("summarize", "루프 상태 확인")
+            return fmt._loop_state()
+
+        first = asyncio.run(runner())
+        second = asyncio.run(runner())
+        assert first is not second
+        assert first.client.is_closed and second.client.is_closed
+        assert fmt._loop_states == {}
+
+
+class TestEndpointErrors:
+    """잘못된 요청 본문 오류 형식 테스트"""
+
+    def test_malformed_body_keeps_error_shape(self):
+        from fastapi.testclient import TestClient
+        from api.index import app
+
+        client = TestClient(app)
+        for path, body in [("/api/format", b"{bad"), ("/api/format/batch", b"{}")]:
+            response = client.post(path, content=body, headers={"Content-Type": "application/json"})
+            assert response.status_code == 500
+            data = response.json()
+            assert data["success"] is False
+            assert data["error"]
+
+    def test_null_text_and_numeric_key_accepted(self):
+        from fastapi.testclient import TestClient
+        from api.index import app
+
+        client = TestClient(app)
+        response = client.post("/api/format", json={"text": None, "mode": None})
+        assert response.status_code == 200
+        assert response.json() == {"success": True, "result": ""}
+
+        response = client.post("/api/format/batch", json={"items": [{"key": 1, "text": None}]})
+        assert response.status_code == 200
+        assert response.json() == {"success": True, "results": {"1": ""}}
@@ -141,6 +141,17 @@ class TestResearchSaeteukLinker:
         assert linker._check_subject_match("화학I", "화학II") == "similar"
         assert linker._check_subject_match("국어", "수학") == "none"
 
+    def test_subclass_subject_groups(self):
+        from src.linker.research_saeteuk_linker import SubjectGroup
+
+        class CustomLinker(ResearchSaeteukLinker):
+            SUBJECT_GROUPS = [SubjectGroup('어문', {'국어', '영어'})]
+
+        assert CustomLinker()._check_subject_match("국어", "영어") == "similar"
+        assert CustomLinker().subject_to_group == {'국어': '어문', '영어': '어문'}
+        assert ResearchSaeteukLinker()._check_subject_match("국어", "영어") == "none"
+        assert ResearchSaeteukLinker().subject_to_group is ResearchSaeteukLinker.SUBJECT_TO_GROUP
+
 
 class TestMarkdownGenerator:
     """마크다운 생성기 테스트"""
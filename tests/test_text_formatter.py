@@ -0,0 +1,50 @@
+"""TextFormatter API 생략 판별 / 배치 처리 테스트"""
+
+from rag.text_formatter import TextFormatter, _needs_formatting
+
+
+class TestNeedsFormatting:
+    """띄어쓰기 교정 필요 여부 판별 테스트"""
+
+    def test_well_spaced_skips_api(self):
+        text = "물리 과목을 보강하여 성취하는 경험을 통해 자기관리를 단계적으로 실천함."
+        assert _needs_formatting(text) is False
+
+    def test_no_hangul_skips_api(self):
+        assert _needs_formatting("ESG report 2024, v1.2") is False
+
+    def test_unspaced_needs_api(self):
+        text = "로마콘크리트가친환경적이라는기사로친환경적인신소재에대한관심을갖게됨"
+        assert _needs_formatting(text) is True
+
+    def test_single_glued_segment_needs_api(self):
+        # 대부분 띄어 썼어도 한 구간이 붙어 있으면 교정
+        text = "물리 과목을 보강하여 성취하는 경험을 통해 자기관리를단계적으로 실천함."
+        assert _needs_formatting(text) is True
+
+    def test_several_short_glued_segments_need_api(self):
+        text = "나는 오늘 학교에서 친구들과함께 수학 공부를 했고 실험결과를 정리해 보고서를작성함"
+        assert _needs_formatting(text) is True
+
+    def test_per_character_spacing_needs_api(self):
+        assert _needs_formatting("자 기 관 리 를 실 천 함") is True
+
+
+class TestFormatBatch:
+    """배치 포맷팅 테스트"""
+
+    def test_duplicates_sent_once_in_input_order(self, monkeypatch):
+        formatter = TextFormatter(api_key="test")
+        calls = []
+
+        def fake_format(text):
+            calls.append(text)
+            if text == "실패":
+                raise RuntimeError("boom")
+            return text.upper()
+
+        monkeypatch.setattr(formatter, "format_text", fake_format)
+        texts = ["b", "a", "b", "실패", "c", "a"]
+
+        assert formatter.format_batch(texts) == ["B", "A", "B", "실패", "C", "A"]
+        assert sorted(calls) == sorted(["a", "b", "c", "실패"])